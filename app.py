@@ -1,8 +1,16 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import threading
+import time
 import uuid
 import base64  # for decoding Pub/Sub data field
 import json
 
+import google.auth.exceptions
+import google.auth.jwt
+import google.auth.transport.requests
 from flask import Flask, jsonify, request
 
 from config import load_settings, Settings
@@ -10,13 +18,17 @@ from telegram_bot import TelegramBot
 from sheets_repo import ReminderSheetRepository, Reminder
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from typing import Dict, Any, Optional, Collection
+from typing import Dict, Any, Optional, Collection, Callable
 from email.utils import parseaddr
-from gmail_client import GmailClient
+from gmail_client import GmailClient, get_gmail_client
 
 # In-memory per-chat state for /new manual reminders
 manual_new_state: Dict[int, Dict[str, Any]] = {}
 
+# Guards every read / write of manual_new_state, so a double-tapped offset button or a
+# description racing a callback can't both act on the same /new flow.
+manual_new_state_lock = threading.Lock()
+
 # In-memory per-chat state for custom datetime input
 # Example structure:
 # {
@@ -25,15 +37,151 @@ manual_new_state: Dict[int, Dict[str, Any]] = {}
 #       "description": str,
 #       "original_chat_id": int,
 #       "original_message_id": int | None,
+#       "prompt_message_id": int | None,  # None until the prompt has been sent
+#       "prompt_chat_id": int,
 #   }
 # }
 custom_datetime_state: Dict[int, Dict[str, Any]] = {}
 
+# Guards every read / write of custom_datetime_state (seeding a flow, recording its prompt
+# message, the datetime reply and cancel), so concurrent updates for the same chat can't
+# clobber each other mid-update.
+custom_datetime_state_lock = threading.Lock()
+
+# Max Gmail pushes waiting for the background worker before new ones are dropped
+GMAIL_TASK_QUEUE_MAXSIZE = 1000
+
+# How often LAST_HISTORY_ID is written back to the Sheets Config tab (at most)
+HISTORY_ID_FLUSH_INTERVAL_SECONDS = 5
+# Most new messages handled per Gmail push; a bigger backlog continues in a follow-up task
+GMAIL_MAX_MESSAGES_PER_PUSH = 50
+# Gmail push envelopes are a few hundred bytes; anything far bigger isn't one of ours
+MAX_PUBSUB_ENVELOPE_BYTES = 64 * 1024
+
+# Google's public keys for the ID tokens Pub/Sub attaches to authenticated pushes.
+# They rotate every few days, so re-downloading them hourly is plenty.
+GOOGLE_ID_TOKEN_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_CERTS_CACHE_SECONDS = 3600
+# A token signed with a key we don't know yet triggers an early re-download, but at most this
+# often, so forged tokens with made-up key ids can't make us hammer Google
+GOOGLE_CERTS_MIN_REFRESH_SECONDS = 60
+GOOGLE_ID_TOKEN_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
 # will show errors in the console with different levels - levels are just priority labels for these messages,
 # like DEBUG, INFO, WARNING etc. (similar to roblox studio)
-logging.basicConfig(level=logging.INFO)
+# Records are queued and written to stderr by a QueueListener thread, so request threads never
+# block on a slow console / log pipe.
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(_log_queue)])
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
+# Returned by safe_call-wrapped functions when the underlying call raised.
+# A sentinel (rather than None) because repo methods like create_reminder legitimately return None.
+CALL_FAILED = object()
+
+
+def safe_call(
+    log_message: str,
+    on_error: Optional[Callable[[], Any]] = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator factory for repo / Gmail calls made while handling a Telegram update.
+
+    Usage:
+        result = safe_call("Error deleting reminder", notify)(repo.delete_reminder)(reminder_id)
+        if result is CALL_FAILED:
+            return "", 200
+
+    On exception: logs log_message with the traceback, runs on_error (e.g. answer the
+    callback query so the user sees a toast) and returns CALL_FAILED instead of raising.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                logger.exception(log_message)
+                if on_error is not None:
+                    on_error()
+                return CALL_FAILED
+
+        return wrapper
+
+    return decorator
+
+
+def record_prompt_message(chat_id: int, sent: Any) -> None:
+    """
+    Store the id of a just-sent custom datetime prompt on the chat's custom state,
+    so the prompt can be cleaned up on success / cancel.
+
+    sent is whatever bot.send_message returned (telebot Message or a dict).
+    """
+    if isinstance(sent, dict):
+        prompt_message_id = sent.get("message_id")
+    else:
+        prompt_message_id = getattr(sent, "message_id", None)
+
+    if prompt_message_id is None:
+        logger.warning("Could not capture prompt_message_id for chat_id=%s", chat_id)
+        return
+
+    with custom_datetime_state_lock:
+        state_custom = custom_datetime_state.get(chat_id)
+        # The flow may already have been cancelled / completed by a concurrent update
+        if state_custom is not None:
+            state_custom.update({"prompt_message_id": prompt_message_id, "prompt_chat_id": chat_id})
+
+
+def set_manual_state(chat_id: int, state: Dict[str, Any]) -> None:
+    """Start (or move to the next stage of) the /new flow for chat_id."""
+    with manual_new_state_lock:
+        manual_new_state[chat_id] = state
+
+
+def take_manual_state(chat_id: int, stage: str) -> Optional[Dict[str, Any]]:
+    """
+    Remove and return chat_id's /new state if it is at stage, else None.
+
+    Taking the state instead of just reading it means only one of two concurrent updates for
+    the same step (e.g. a double-tapped offset button) carries on with it.
+    """
+    with manual_new_state_lock:
+        state = manual_new_state.get(chat_id)
+        if state is None or state.get("stage") != stage:
+            return None
+        del manual_new_state[chat_id]
+        return state
+
+
+def restore_manual_state(chat_id: int, state: Dict[str, Any]) -> None:
+    """Put back a state taken with take_manual_state, unless a newer /new flow has started."""
+    with manual_new_state_lock:
+        manual_new_state.setdefault(chat_id, state)
+
+
+def get_custom_state(chat_id: int) -> Optional[Dict[str, Any]]:
+    """Current custom datetime state for chat_id, or None if no custom flow is active."""
+    with custom_datetime_state_lock:
+        return custom_datetime_state.get(chat_id)
+
+
+def clear_custom_state(chat_id: int, state_custom: Dict[str, Any]) -> None:
+    """
+    End the custom datetime flow that state_custom belongs to.
+
+    The datetime reply does slow Sheets / Gmail / Telegram calls between reading the state and
+    clearing it; if a callback seeded a new flow for this chat meanwhile, leave that one alone.
+    """
+    with custom_datetime_state_lock:
+        if custom_datetime_state.get(chat_id) is state_custom:
+            del custom_datetime_state[chat_id]
+
+
 def is_sender_allowed(from_header: str, allowed_senders: Collection[str]) -> bool:
     """Return True if the From header matches one of the allowed sender emails."""
     if not allowed_senders:
@@ -43,10 +191,86 @@ def is_sender_allowed(from_header: str, allowed_senders: Collection[str]) -> boo
     if not email:
         return False
 
+    # allowed_senders is expected to be casefolded already (see parse_allowed_sender_emails)
     cleaned = email.casefold().strip()
     return cleaned in allowed_senders
 
 
+# One transport (and so one requests.Session) for cert downloads, plus the cached certs
+_google_auth_request = google.auth.transport.requests.Request()
+_google_certs: Dict[str, Any] = {"fetched_at": 0.0, "certs": None}
+_google_certs_lock = threading.Lock()
+
+
+def _get_google_certs(force_refresh: bool = False) -> Dict[str, str]:
+    """
+    Google's ID token certs (key id -> PEM), cached for GOOGLE_CERTS_CACHE_SECONDS.
+
+    force_refresh re-downloads them before the cache expires (after a key rotation), unless they
+    were fetched less than GOOGLE_CERTS_MIN_REFRESH_SECONDS ago.
+    """
+    with _google_certs_lock:
+        age = time.monotonic() - _google_certs["fetched_at"]
+        if (
+            _google_certs["certs"] is None
+            or age > GOOGLE_CERTS_CACHE_SECONDS
+            or (force_refresh and age > GOOGLE_CERTS_MIN_REFRESH_SECONDS)
+        ):
+            response = _google_auth_request(GOOGLE_ID_TOKEN_CERTS_URL, method="GET")
+            if response.status != 200:
+                raise google.auth.exceptions.TransportError(
+                    f"Could not fetch Google certs (HTTP {response.status})"
+                )
+            _google_certs["certs"] = json.loads(response.data)
+            _google_certs["fetched_at"] = time.monotonic()
+        return _google_certs["certs"]
+
+
+def verify_pubsub_push_token(
+    authorization_header: Optional[str],
+    audience: str,
+    service_account_email: Optional[str],
+) -> bool:
+    """
+    Return True if the request carries a valid Google-signed ID token for our push subscription.
+
+    Checks signature, expiry, issuer and audience, and (if configured) that the token was
+    minted for the push subscription's service account. Any Google account can mint a token
+    for an arbitrary audience, so the email check is what actually pins it to our subscription.
+    """
+    scheme, _, token = (authorization_header or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    try:
+        certs = _get_google_certs()
+        # Google may have rotated its signing key since the certs were cached; fetch them again
+        # rather than rejecting every push until the hourly refresh
+        if google.auth.jwt.decode_header(token).get("kid") not in certs:
+            certs = _get_google_certs(force_refresh=True)
+        claims = google.auth.jwt.decode(
+            token,
+            certs=certs,
+            audience=audience,
+            clock_skew_in_seconds=10,
+        )
+    except (ValueError, google.auth.exceptions.GoogleAuthError) as e:
+        logger.warning("Rejected Pub/Sub push token: %s", e)
+        return False
+
+    if claims.get("iss") not in GOOGLE_ID_TOKEN_ISSUERS:
+        logger.warning("Rejected Pub/Sub push token: unexpected issuer %r", claims.get("iss"))
+        return False
+
+    if service_account_email and (
+        claims.get("email") != service_account_email or not claims.get("email_verified")
+    ):
+        logger.warning("Rejected Pub/Sub push token: unexpected email %r", claims.get("email"))
+        return False
+
+    return True
+
+
 def create_app() -> Flask:
     app = Flask(__name__) # this is the flask app, storing routes, requests and configuration settings
     # and also sending responses etc.
@@ -55,7 +279,15 @@ def create_app() -> Flask:
     settings: Settings = load_settings()
     app.config["SETTINGS"] = settings
     app.config["ALLOWED_SENDER_EMAILS"] = settings.allowed_sender_emails
-    app.config["ALLOWED_SENDER_SET"] = set(settings.allowed_sender_emails)
+    # Already casefolded by parse_allowed_sender_emails; frozen so the hot path is a pure lookup
+    app.config["ALLOWED_SENDER_SET"] = frozenset(settings.allowed_sender_emails)
+    # App timezone (Asia/Singapore by default), resolved once instead of per request
+    app.config["TZ"] = ZoneInfo(settings.timezone)
+    # Labels a new message must carry to be processed. With a Gmail filter labelling allowed
+    # senders, other mail never reaches messages.get; otherwise fall back to the whole INBOX.
+    app.config["GMAIL_HISTORY_LABEL_IDS"] = (
+        [settings.gmail_watch_label_id] if settings.gmail_watch_label_id else ["INBOX"]
+    )
 
     # Initialise TelegramBot (maybe None if token is missing)
     telegram_bot = None
@@ -89,7 +321,7 @@ def create_app() -> Flask:
     gmail_client = None
     if settings.gmail_oauth_token_json:
         try:
-            gmail_client = GmailClient(settings.gmail_oauth_token_json)
+            gmail_client = get_gmail_client(settings.gmail_oauth_token_json)
             logger.info("Initialised GmailClient successfully.")
         except Exception:
             logger.exception("Failed to initialise GmailClient.")
@@ -111,6 +343,38 @@ def create_app() -> Flask:
         logger.info("Sheets repo missing; LAST_HISTORY_ID will remain in-memory only.")
 
     app.config["LAST_HISTORY_ID"] = top_level_last_history_id
+    # What the Config sheet currently holds; LAST_HISTORY_ID is flushed when it differs
+    app.config["LAST_PERSISTED_HISTORY_ID"] = top_level_last_history_id
+
+    # Persisting last_history_id is debounced: Gmail push processing only updates LAST_HISTORY_ID
+    # in memory, and a background thread writes it to Sheets at most every few seconds.
+    history_id_flush_lock = threading.Lock()
+
+    def flush_last_history_id() -> None:
+        """Write LAST_HISTORY_ID to the Config sheet if it changed since the last write."""
+        with history_id_flush_lock:
+            repo: ReminderSheetRepository | None = app.config.get("REMINDER_REPO")
+            pending = app.config.get("LAST_HISTORY_ID")
+            if repo is None or pending is None or pending == app.config.get("LAST_PERSISTED_HISTORY_ID"):
+                return
+
+            try:
+                repo.write_config_value("last_history_id", str(pending))
+            except Exception:
+                logger.exception("Failed to persist last_history_id=%s to Config sheet", pending)
+                return
+
+            app.config["LAST_PERSISTED_HISTORY_ID"] = pending
+            logger.info("Persisted last_history_id=%s to Config sheet", pending)
+
+    def history_id_flusher() -> None:
+        while True:
+            time.sleep(HISTORY_ID_FLUSH_INTERVAL_SECONDS)
+            flush_last_history_id()
+
+    threading.Thread(target=history_id_flusher, name="history-id-flusher", daemon=True).start()
+    # Don't lose the newest id on shutdown (gunicorn worker exit / SIGTERM)
+    atexit.register(flush_last_history_id)
 
     @app.route("/", methods=["GET"])
     def index():
@@ -149,7 +413,8 @@ def create_app() -> Flask:
         repo: ReminderSheetRepository | None = app.config.get("REMINDER_REPO")
 
         update = request.get_json(silent=True) or {}
-        logger.info("Received Telegram update: %s", update)
+        # Full updates contain user-typed text; only dump them when debugging
+        logger.debug("Received Telegram update: %s", update)
 
         if not bot.is_allowed_user(update):
             logger.warning("Update from disallowed user, ignoring.")
@@ -192,9 +457,9 @@ def create_app() -> Flask:
                 return "", 200
 
             # 0) If this chat is waiting for a custom datetime, handle that first
-            state_custom = custom_datetime_state.get(chat_id)
+            state_custom = get_custom_state(chat_id)
             if state_custom:
-                tz = ZoneInfo(settings.timezone)
+                tz = app.config["TZ"]
 
                 parsed_dt = parse_custom_datetime(text, tz)
                 if parsed_dt is None:
@@ -207,6 +472,10 @@ def create_app() -> Flask:
                     )
                     return "", 200
 
+                # Card the flow started from, and which chat the resulting reminder belongs to
+                original_chat_id = state_custom.get("original_chat_id", chat_id)
+                target_chat_id = settings.telegram_user_id or original_chat_id
+
                 mode = state_custom.get("mode")
                 if mode == "manual":
                     # Create manual reminder with this custom datetime
@@ -217,11 +486,10 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Storage not configured; could not save reminder.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     description = state_custom.get("description") or ""
-                    original_chat_id = state_custom.get("original_chat_id", chat_id)
                     original_message_id = state_custom.get("original_message_id")
                     prompt_message_id = state_custom.get("prompt_message_id")
                     prompt_chat_id = state_custom.get("prompt_chat_id", chat_id)
@@ -234,7 +502,7 @@ def create_app() -> Flask:
                         sender=None,
                         recipient=None,
                         description=description,
-                        telegram_chat_id=settings.telegram_user_id or original_chat_id,
+                        telegram_chat_id=target_chat_id,
                         due_at=parsed_dt,
                         status="pending",
                     )
@@ -247,7 +515,7 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Failed to save reminder.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     confirmation_text = (
@@ -287,7 +555,7 @@ def create_app() -> Flask:
                             )
 
                     # Clear custom state for this chat
-                    custom_datetime_state.pop(chat_id, None)
+                    clear_custom_state(chat_id, state_custom)
                     return "", 200
 
                 elif mode == "email":
@@ -302,11 +570,10 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Storage or email access not configured; could not save reminder.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     gmail_message_id = state_custom.get("gmail_message_id")
-                    original_chat_id = state_custom.get("original_chat_id", chat_id)
                     original_message_id = state_custom.get("original_message_id")
                     original_text = state_custom.get("original_text") or ""
                     prompt_message_id = state_custom.get("prompt_message_id")
@@ -321,7 +588,7 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Failed to read email metadata; reminder not created.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     subject = meta.get("subject")
@@ -336,7 +603,7 @@ def create_app() -> Flask:
                         sender=sender,
                         recipient=recipient,
                         description=None,
-                        telegram_chat_id=settings.telegram_user_id or original_chat_id,
+                        telegram_chat_id=target_chat_id,
                         due_at=parsed_dt,
                         status="pending",
                     )
@@ -349,7 +616,7 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Failed to save email reminder.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     # Edit original email card
@@ -396,7 +663,7 @@ def create_app() -> Flask:
                                 "Error editing email custom datetime prompt message after success."
                             )
 
-                    custom_datetime_state.pop(chat_id, None)
+                    clear_custom_state(chat_id, state_custom)
                     return "", 200
 
                 elif mode == "snooze":
@@ -408,11 +675,10 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Storage not configured; could not snooze reminder.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     reminder_id = state_custom.get("reminder_id")
-                    original_chat_id = state_custom.get("original_chat_id", chat_id)
                     original_message_id = state_custom.get("original_message_id")
                     original_text = state_custom.get("original_text") or "Reminder"
                     prompt_message_id = state_custom.get("prompt_message_id")
@@ -426,7 +692,7 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Failed to snooze reminder.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     if not updated:
@@ -434,7 +700,7 @@ def create_app() -> Flask:
                             chat_id=chat_id,
                             text="Reminder not found.",
                         )
-                        custom_datetime_state.pop(chat_id, None)
+                        clear_custom_state(chat_id, state_custom)
                         return "", 200
 
                     new_text = original_text + f"\n\n⏰ Snoozed to {parsed_dt.isoformat()}."
@@ -471,11 +737,11 @@ def create_app() -> Flask:
                                 "Error editing custom snooze prompt message after success."
                             )
 
-                    custom_datetime_state.pop(chat_id, None)
+                    clear_custom_state(chat_id, state_custom)
                     return "", 200
 
                     # Unknown mode – just clear and ignore
-                custom_datetime_state.pop(chat_id, None)
+                clear_custom_state(chat_id, state_custom)
                 return "", 200
 
             # 1) /start
@@ -488,7 +754,7 @@ def create_app() -> Flask:
 
             # 2) /new: start manual reminder flow
             if text == "/new":
-                manual_new_state[chat_id] = {"stage": "awaiting_description"}
+                set_manual_state(chat_id, {"stage": "awaiting_description"})
                 bot.send_message(
                     chat_id=chat_id,
                     text="What should I remind you about?",
@@ -496,10 +762,11 @@ def create_app() -> Flask:
                 return "", 200
 
             # 3) If we are expecting a description after /new
-            state = manual_new_state.get(chat_id)
-            if state and state.get("stage") == "awaiting_description":
+            state = take_manual_state(chat_id, "awaiting_description")
+            if state:
                 description = text
                 if not description:
+                    restore_manual_state(chat_id, state)
                     bot.send_message(
                         chat_id=chat_id,
                         text="Please send a short description for the reminder.",
@@ -507,10 +774,13 @@ def create_app() -> Flask:
                     return "", 200
 
                 # Save description, move to next stage
-                manual_new_state[chat_id] = {
-                    "stage": "awaiting_offset",
-                    "description": description,
-                }
+                set_manual_state(
+                    chat_id,
+                    {
+                        "stage": "awaiting_offset",
+                        "description": description,
+                    },
+                )
 
                 # Show buttons for +1h/+1d/+3d/+1w (+ Custom will be added in the keyboard)
                 keyboard = bot.build_manual_offset_keyboard()
@@ -536,252 +806,414 @@ def create_app() -> Flask:
             message_id = message.get("message_id")
             callback_query_id = callback_query.get("id")
 
-            if chat_id is None:
-                if callback_query_id:
-                    bot.answer_callback_query(
-                        callback_query_id,
-                        text="No chat id",
-                        show_alert=False,
-                    )
-                return "", 200
+            def notify_failure(text: str, show_alert: bool = True) -> Callable[[], None]:
+                """Build a safe_call on_error hook that answers this callback query with text."""
 
-            # ------- custom_cancel:mode -> cancel custom datetime flow ------- #
-            if data.startswith("custom_cancel:"):
-                # Pop any custom datetime state for this chat
-                state_custom = custom_datetime_state.pop(chat_id, None)
+                def notify() -> None:
+                    if callback_query_id:
+                        bot.answer_callback_query(
+                            callback_query_id,
+                            text=text,
+                            show_alert=show_alert,
+                        )
 
-                # If we were in manual custom mode, restore the awaiting_offset state, so that users can press the buttons "+1h, +1 day, +1 week, custom" again
-                if state_custom and state_custom.get("mode") == "manual":
-                    description = state_custom.get("description") or ""
-                    manual_new_state[chat_id] = {
-                        "stage": "awaiting_offset",
-                        "description": description,
-                    }
+                return notify
 
+            if chat_id is None:
                 if callback_query_id:
                     bot.answer_callback_query(
                         callback_query_id,
-                        text="Custom date entry cancelled.",
+                        text="No chat id",
                         show_alert=False,
                     )
-
-                # Edit the prompt message (the one with Cancel) to show cancelled and remove keyboard
-                if message_id is not None:
-                    try:
-                        bot.edit_message_text(
-                            chat_id=chat_id,
-                            message_id=message_id,
-                            text="Custom date entry cancelled.",
-                            reply_markup=None,  # remove Cancel button
-                        )
-                    except Exception:
-                        logger.exception("Failed to edit message after custom_cancel callback.")
-
                 return "", 200
 
-            # ------- manual_offset:... -> create manual reminder or enter custom flow ------- #
-            if data.startswith("manual_offset:"):
-                if repo is None:
-                    logger.error("Sheets repo not configured; cannot create manual reminder.")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Storage not configured.",
-                            show_alert=True,
+            # Which chat any reminder created from this button press belongs to
+            target_chat_id = settings.telegram_user_id or chat_id
+
+            # format: <prefix>:<arg>[:<arg>] -> split once and dispatch on the shape
+            parts = data.split(":")
+            match parts:
+                # ------- custom_cancel:mode -> cancel custom datetime flow ------- #
+                case ["custom_cancel", *_]:
+                    # Pop any custom datetime state for this chat
+                    with custom_datetime_state_lock:
+                        state_custom = custom_datetime_state.pop(chat_id, None)
+
+                    # If we were in manual custom mode, restore the awaiting_offset state, so that users can press the buttons "+1h, +1 day, +1 week, custom" again
+                    if state_custom and state_custom.get("mode") == "manual":
+                        description = state_custom.get("description") or ""
+                        set_manual_state(
+                            chat_id,
+                            {
+                                "stage": "awaiting_offset",
+                                "description": description,
+                            },
                         )
-                    return "", 200
 
-                # Check we have pending description for this chat
-                state = manual_new_state.get(chat_id)
-                if not state or state.get("stage") != "awaiting_offset":
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="No pending reminder.",
+                            text="Custom date entry cancelled.",
                             show_alert=False,
                         )
+
+                    # Edit the prompt message (the one with Cancel) to show cancelled and remove keyboard
+                    if message_id is not None:
+                        try:
+                            bot.edit_message_text(
+                                chat_id=chat_id,
+                                message_id=message_id,
+                                text="Custom date entry cancelled.",
+                                reply_markup=None,  # remove Cancel button
+                            )
+                        except Exception:
+                            logger.exception("Failed to edit message after custom_cancel callback.")
+
                     return "", 200
 
-                description = state.get("description") or ""
-                offset_key = data.split(":", 1)[1]  # "1h", "1d", "3d", "1w" or "custom"
+                # ------- manual_offset:... -> create manual reminder or enter custom flow ------- #
+                case ["manual_offset", offset_key]:  # "1h", "1d", "3d", "1w" or "custom"
+                    if repo is None:
+                        logger.error("Sheets repo not configured; cannot create manual reminder.")
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Storage not configured.",
+                                show_alert=True,
+                            )
+                        return "", 200
 
-                # NEW: handle custom offset by entering custom datetime state
-                if offset_key == "custom":
-                    # Seed state with info about the original card
-                    custom_datetime_state[chat_id] = {
-                        "mode": "manual",
-                        "description": description,
-                        "original_chat_id": chat_id,
-                        "original_message_id": message_id,
-                        # prompt_message_id will be filled after send_message
-                    }
+                    # Preset offsets (+1h, +1d, +3d, +1w); checked before taking the /new state
+                    delta = offset_key_to_delta(offset_key)
+                    if offset_key != "custom" and delta is None:
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Unknown offset.",
+                                show_alert=False,
+                            )
+                        return "", 200
 
-                    # Once we enter custom mode, this /new flow is no longer in awaiting_offset
-                    manual_new_state.pop(chat_id, None)
+                    # Check we have pending description for this chat. Taking it means a second
+                    # tap on the keyboard finds nothing and can't create a duplicate reminder.
+                    state = take_manual_state(chat_id, "awaiting_offset")
+                    if not state:
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="No pending reminder.",
+                                show_alert=False,
+                            )
+                        return "", 200
 
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Send a custom date/time.",
-                            show_alert=False,
+                    description = state.get("description") or ""
+
+                    # NEW: handle custom offset by entering custom datetime state
+                    if offset_key == "custom":
+                        # Seed state with info about the original card
+                        with custom_datetime_state_lock:
+                            custom_datetime_state[chat_id] = {
+                                "mode": "manual",
+                                "description": description,
+                                "original_chat_id": chat_id,
+                                "original_message_id": message_id,
+                                "prompt_message_id": None,  # filled in once the prompt is sent
+                                "prompt_chat_id": chat_id,
+                            }
+
+                        # The /new state was taken above: once we enter custom mode, this flow
+                        # is no longer in awaiting_offset
+
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Send a custom date/time.",
+                                show_alert=False,
+                            )
+
+                        cancel_keyboard = bot.build_custom_datetime_cancel_keyboard("manual")
+
+                        # Send prompt asking for custom datetime, with Cancel button
+                        sent = bot.send_message(
+                            chat_id=chat_id,
+                            text=(
+                                "Please type the date and time in DD/MM/YYYY HH:MM "
+                                "(e.g. 25/12/2025 14:30)."
+                            ),
+                            reply_markup=cancel_keyboard,
                         )
 
-                    cancel_keyboard = bot.build_custom_datetime_cancel_keyboard("manual")
+                        # Record the prompt message_id so we can clean it up later
+                        record_prompt_message(chat_id, sent)
 
-                    # Send prompt asking for custom datetime, with Cancel button
-                    sent = bot.send_message(
-                        chat_id=chat_id,
-                        text=(
-                            "Please type the date and time in DD/MM/YYYY HH:MM "
-                            "(e.g. 25/12/2025 14:30)."
-                        ),
-                        reply_markup=cancel_keyboard,
-                    )
+                        return "", 200
 
-                    # Try to record the prompt message_id so we can clean it up later
-                    try:
-                        if isinstance(sent, dict):
-                            prompt_message_id = sent.get("message_id")
-                        else:
-                            prompt_message_id = getattr(sent, "message_id", None)
+                    tz = app.config["TZ"]
+                    now = datetime.now(tz)
+                    due_at = now + delta
 
-                        if prompt_message_id is not None:
-                            state_custom = custom_datetime_state.get(chat_id) or {}
-                            state_custom["prompt_message_id"] = prompt_message_id
-                            state_custom["prompt_chat_id"] = chat_id
-                            custom_datetime_state[chat_id] = state_custom
-                    except Exception:
-                        logger.exception(
-                            "Failed to capture prompt_message_id for custom datetime."
-                        )
+                    reminder = Reminder(
+                        reminder_id=str(uuid.uuid4()),
+                        source_type="manual",
+                        gmail_message_id=None,
+                        subject=None,
+                        sender=None,
+                        recipient=None,
+                        description=description,
+                        telegram_chat_id=target_chat_id,
+                        due_at=due_at,
+                        status="pending",
+                    )
 
-                    return "", 200
+                    result = safe_call(
+                        "Error creating manual reminder from callback",
+                        notify_failure("Failed to save reminder."),
+                    )(repo.create_reminder)(reminder)
+                    if result is CALL_FAILED:
+                        # Let the user press the button again
+                        restore_manual_state(chat_id, state)
+                        return "", 200
 
-                # Existing preset offsets (+1h, +1d, +3d, +1w)
-                delta = offset_key_to_delta(offset_key)
-                if delta is None:
+                    # Stop spinner
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="Unknown offset.",
+                            text="Reminder created.",
                             show_alert=False,
                         )
-                    return "", 200
 
-                tz = ZoneInfo(settings.timezone)
-                now = datetime.now(tz)
-                due_at = now + delta
-
-                reminder = Reminder(
-                    reminder_id=str(uuid.uuid4()),
-                    source_type="manual",
-                    gmail_message_id=None,
-                    subject=None,
-                    sender=None,
-                    recipient=None,
-                    description=description,
-                    telegram_chat_id=settings.telegram_user_id or chat_id,
-                    due_at=due_at,
-                    status="pending",
-                )
+                    confirmation_text = (
+                        f"✅ Reminder created for {due_at.isoformat()}:\n{description}"
+                    )
+
+                    # Prefer editing the original keyboard message; fall back to new message
+                    if message_id is not None:
+                        bot.edit_message_text(
+                            chat_id=chat_id,
+                            message_id=message_id,
+                            text=confirmation_text,
+                            reply_markup=None,  # remove keyboard
+                        )
+                    else:
+                        bot.send_message(
+                            chat_id=chat_id,
+                            text=confirmation_text,
+                        )
+                    return "", 200
 
-                try:
-                    repo.create_reminder(reminder)
-                except Exception:
-                    logger.exception("Error creating manual reminder from callback")
+                case ["manual_offset", *_]:
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="Failed to save reminder.",
-                            show_alert=True,
+                            text="Invalid manual offset.",
+                            show_alert=False,
                         )
                     return "", 200
 
-                # Clear state
-                manual_new_state.pop(chat_id, None)
+                # ------- email_action:... -> Set reminder / Done for email ------- #
+                case ["email_action", action, gmail_message_id]:
+                    # format: email_action:<action>:<gmail_message_id>
+                    if action == "set":
+                        # Replace the Set/Done keyboard with the offset keyboard on the same message
+                        keyboard = bot.build_email_offset_keyboard(gmail_message_id)
+
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Choose when to be reminded.",
+                                show_alert=False,
+                            )
 
-                # Stop spinner
-                if callback_query_id:
-                    bot.answer_callback_query(
-                        callback_query_id,
-                        text="Reminder created.",
-                        show_alert=False,
-                    )
+                        base_text = message.get("text") or "New email"
+                        new_text = base_text + "\n\nWhen should I remind you about this email?"
 
-                confirmation_text = (
-                    f"✅ Reminder created for {due_at.isoformat()}:\n{description}"
-                )
+                        if message_id is not None:
+                            bot.edit_message_text(
+                                chat_id=chat_id,
+                                message_id=message_id,
+                                text=new_text,
+                                reply_markup=keyboard,  # new keyboard
+                            )
+                        else:
+                            bot.send_message(
+                                chat_id=chat_id,
+                                text="When should I remind you about this email?",
+                                reply_markup=keyboard,
+                            )
+                        return "", 200
 
-                # Prefer editing the original keyboard message; fall back to new message
-                if message_id is not None:
-                    bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        text=confirmation_text,
-                        reply_markup=None,  # remove keyboard
-                    )
-                else:
-                    bot.send_message(
-                        chat_id=chat_id,
-                        text=confirmation_text,
-                    )
-                return "", 200
+                    if action == "done":
+                        # No reminder created, just acknowledge + update card
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Marked as done. No reminder created.",
+                                show_alert=False,
+                            )
 
-            # ------- email_action:... -> Set reminder / Done for email ------- #
-            if data.startswith("email_action:"):
-                # format: email_action:<action>:<gmail_message_id>
-                parts = data.split(":", 2)
-                if len(parts) != 3:
+                        base_text = message.get("text") or "New email"
+                        new_text = base_text + "\n\n✅ Marked as done. No reminder created."
+
+                        if message_id is not None:
+                            bot.edit_message_text(
+                                chat_id=chat_id,
+                                message_id=message_id,
+                                text=new_text,
+                                reply_markup=None,  # remove keyboard
+                            )
+                        else:
+                            bot.send_message(
+                                chat_id=chat_id,
+                                text="Okay, I won't create a reminder for this email.",
+                            )
+                        return "", 200
+
+                    # Unknown email action
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="Invalid email action.",
+                            text="Unknown email action.",
                             show_alert=False,
                         )
                     return "", 200
 
-                _, action, gmail_message_id = parts
-
-                if action == "set":
-                    # Replace the Set/Done keyboard with the offset keyboard on the same message
-                    keyboard = bot.build_email_offset_keyboard(gmail_message_id)
-
+                case ["email_action", *_]:
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="Choose when to be reminded.",
+                            text="Invalid email action.",
                             show_alert=False,
                         )
+                    return "", 200
+
+                # ------- email_offset:... -> create email-based reminder or enter custom flow ------- #
+                case ["email_offset", gmail_message_id, offset_key]:
+                    # format: email_offset:<gmail_message_id>:<key>
+                    if repo is None:
+                        logger.error("Sheets repo not configured; cannot create email reminder.")
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Storage not configured.",
+                                show_alert=True,
+                            )
+                        return "", 200
 
-                    base_text = message.get("text") or "New email"
-                    new_text = base_text + "\n\nWhen should I remind you about this email?"
+                    # Need Gmail client for email-based reminders
+                    gmail_client = app.config.get("GMAIL_CLIENT")
+                    if gmail_client is None:
+                        logger.error("Gmail client not configured; cannot create email reminder.")
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Email access not configured.",
+                                show_alert=True,
+                            )
+                        return "", 200
 
-                    if message_id is not None:
-                        bot.edit_message_text(
-                            chat_id=chat_id,
-                            message_id=message_id,
-                            text=new_text,
-                            reply_markup=keyboard,  # new keyboard
-                        )
-                    else:
-                        bot.send_message(
+                    # --- NEW: email custom datetime path --- #
+                    if offset_key == "custom":
+                        # Record enough state to finish later when user sends the datetime
+                        original_text = message.get("text") or ""
+
+                        with custom_datetime_state_lock:
+                            custom_datetime_state[chat_id] = {
+                                "mode": "email",
+                                "gmail_message_id": gmail_message_id,
+                                "original_chat_id": chat_id,
+                                "original_message_id": message_id,
+                                "original_text": original_text,
+                                "prompt_message_id": None,  # filled in once the prompt is sent
+                                "prompt_chat_id": chat_id,
+                            }
+
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Send a custom date/time.",
+                                show_alert=False,
+                            )
+
+                        cancel_keyboard = bot.build_custom_datetime_cancel_keyboard("email")
+
+                        sent = bot.send_message(
                             chat_id=chat_id,
-                            text="When should I remind you about this email?",
-                            reply_markup=keyboard,
+                            text=(
+                                "Please type the date and time in DD/MM/YYYY HH:MM "
+                                "(e.g. 25/12/2025 14:30)."
+                            ),
+                            reply_markup=cancel_keyboard,
                         )
-                    return "", 200
 
-                if action == "done":
-                    # No reminder created, just acknowledge + update card
+                        # Capture prompt_message_id so we can clean it up on success/cancel
+                        record_prompt_message(chat_id, sent)
+
+                        return "", 200
+
+                    # --- Existing preset offsets (+1h, +1d, +3d, +1w) --- #
+                    delta = offset_key_to_delta(offset_key)
+                    if delta is None:
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Unknown offset.",
+                                show_alert=False,
+                            )
+                        return "", 200
+
+                    tz = app.config["TZ"]
+                    now = datetime.now(tz)
+                    due_at = now + delta
+
+                    meta = safe_call(
+                        "Error fetching Gmail metadata for email reminder.",
+                        notify_failure("Failed to read email metadata."),
+                    )(gmail_client.get_message_metadata)(gmail_message_id)
+                    if meta is CALL_FAILED:
+                        return "", 200
+
+                    subject = meta.get("subject")
+                    sender = meta.get("from")
+                    recipient = meta.get("original_recipient") or meta.get("to")
+
+                    reminder = Reminder(
+                        reminder_id=str(uuid.uuid4()),
+                        source_type="email",
+                        gmail_message_id=gmail_message_id,
+                        subject=subject,
+                        sender=sender,
+                        recipient=recipient,
+                        description=None,
+                        telegram_chat_id=target_chat_id,
+                        due_at=due_at,
+                        status="pending",
+                    )
+
+                    result = safe_call(
+                        "Error creating email reminder from callback",
+                        notify_failure("Failed to save reminder."),
+                    )(repo.create_reminder)(reminder)
+                    if result is CALL_FAILED:
+                        return "", 200
+
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="Marked as done. No reminder created.",
+                            text="Email reminder created.",
                             show_alert=False,
                         )
 
-                    base_text = message.get("text") or "New email"
-                    new_text = base_text + "\n\n✅ Marked as done. No reminder created."
+                    base_text = message.get("text") or ""
+                    summary_subject = subject or "(no subject)"
+
+                    if base_text:
+                        new_text = base_text + f"\n\n✅ Reminder created for {due_at.isoformat()}."
+                    else:
+                        new_text = (
+                            f"Reminder created for {due_at.isoformat()} "
+                            f"for email:\n{summary_subject}"
+                        )
 
                     if message_id is not None:
                         bot.edit_message_text(
@@ -793,24 +1225,12 @@ def create_app() -> Flask:
                     else:
                         bot.send_message(
                             chat_id=chat_id,
-                            text="Okay, I won't create a reminder for this email.",
+                            text=new_text,
                         )
-                    return "", 200
 
-                # Unknown email action
-                if callback_query_id:
-                    bot.answer_callback_query(
-                        callback_query_id,
-                        text="Unknown email action.",
-                        show_alert=False,
-                    )
-                return "", 200
+                    return "", 200
 
-            # ------- email_offset:... -> create email-based reminder or enter custom flow ------- #
-            if data.startswith("email_offset:"):
-                # format: email_offset:<gmail_message_id>:<key>
-                parts = data.split(":", 2)
-                if len(parts) != 3:
+                case ["email_offset", *_]:
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
@@ -819,175 +1239,115 @@ def create_app() -> Flask:
                         )
                     return "", 200
 
-                _, gmail_message_id, offset_key = parts
+                # ------- reminder_extend:... -> snooze an existing reminder or enter custom flow ------- #
+                case ["reminder_extend", reminder_id, offset_key]:
+                    # format: reminder_extend:<reminder_id>:<key>
+                    if repo is None:
+                        logger.error("Sheets repo not configured; cannot update reminder.")
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Storage not configured.",
+                                show_alert=True,
+                            )
+                        return "", 200
 
-                if repo is None:
-                    logger.error("Sheets repo not configured; cannot create email reminder.")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Storage not configured.",
-                            show_alert=True,
-                        )
-                    return "", 200
-
-                # Need Gmail client for email-based reminders
-                gmail_client = app.config.get("GMAIL_CLIENT")
-                if gmail_client is None:
-                    logger.error("Gmail client not configured; cannot create email reminder.")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Email access not configured.",
-                            show_alert=True,
-                        )
-                    return "", 200
+                    # --- NEW: custom snooze path --- #
+                    if offset_key == "custom":
+                        base_text = message.get("text") or "Reminder"
+
+                        # Seed state so the next text message is interpreted as custom datetime
+                        with custom_datetime_state_lock:
+                            custom_datetime_state[chat_id] = {
+                                "mode": "snooze",
+                                "reminder_id": reminder_id,
+                                "original_chat_id": chat_id,
+                                "original_message_id": message_id,
+                                "original_text": base_text,
+                                "prompt_message_id": None,  # filled in once the prompt is sent
+                                "prompt_chat_id": chat_id,
+                            }
+
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Send a custom date/time.",
+                                show_alert=False,
+                            )
 
-                # --- NEW: email custom datetime path --- #
-                if offset_key == "custom":
-                    # Record enough state to finish later when user sends the datetime
-                    original_text = message.get("text") or ""
-
-                    custom_datetime_state[chat_id] = {
-                        "mode": "email",
-                        "gmail_message_id": gmail_message_id,
-                        "original_chat_id": chat_id,
-                        "original_message_id": message_id,
-                        "original_text": original_text,
-                        # prompt_message_id will be set after sending prompt
-                    }
+                        cancel_keyboard = bot.build_custom_datetime_cancel_keyboard("snooze")
 
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Send a custom date/time.",
-                            show_alert=False,
+                        sent = bot.send_message(
+                            chat_id=chat_id,
+                            text=(
+                                "Send a new date/time for this reminder in "
+                                "DD/MM/YYYY HH:MM (e.g. 25/12/2025 14:30)."
+                            ),
+                            reply_markup=cancel_keyboard,
                         )
 
-                    cancel_keyboard = bot.build_custom_datetime_cancel_keyboard("email")
+                        # Capture prompt_message_id so we can clean it up later
+                        record_prompt_message(chat_id, sent)
 
-                    sent = bot.send_message(
-                        chat_id=chat_id,
-                        text=(
-                            "Please type the date and time in DD/MM/YYYY HH:MM "
-                            "(e.g. 25/12/2025 14:30)."
-                        ),
-                        reply_markup=cancel_keyboard,
-                    )
+                        return "", 200
 
-                    # Capture prompt_message_id so we can clean it up on success/cancel
-                    try:
-                        if isinstance(sent, dict):
-                            prompt_message_id = sent.get("message_id")
-                        else:
-                            prompt_message_id = getattr(sent, "message_id", None)
+                    # --- Existing fixed-offset snooze (+1h, +1d, +3d, +1w) --- #
+                    delta = offset_key_to_delta(offset_key)
+                    if delta is None:
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Unknown offset.",
+                                show_alert=False,
+                            )
+                        return "", 200
 
-                        if prompt_message_id is not None:
-                            state_custom = custom_datetime_state.get(chat_id) or {}
-                            state_custom["prompt_message_id"] = prompt_message_id
-                            state_custom["prompt_chat_id"] = chat_id
-                            custom_datetime_state[chat_id] = state_custom
-                    except Exception:
-                        logger.exception(
-                            "Failed to capture prompt_message_id for email custom datetime."
-                        )
+                    tz = app.config["TZ"]
+                    now = datetime.now(tz)
+                    new_due_at = now + delta
 
-                    return "", 200
+                    updated = safe_call(
+                        "Error updating reminder due_at",
+                        notify_failure("Failed to snooze reminder."),
+                    )(repo.update_reminder_due_at)(reminder_id, new_due_at)
+                    if updated is CALL_FAILED:
+                        return "", 200
+
+                    if not updated:
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Reminder not found.",
+                                show_alert=False,
+                            )
+                        return "", 200
 
-                # --- Existing preset offsets (+1h, +1d, +3d, +1w) --- #
-                delta = offset_key_to_delta(offset_key)
-                if delta is None:
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="Unknown offset.",
+                            text="Reminder snoozed.",
                             show_alert=False,
                         )
-                    return "", 200
 
-                tz = ZoneInfo(settings.timezone)
-                now = datetime.now(tz)
-                due_at = now + delta
+                    base_text = message.get("text") or "Reminder"
+                    new_text = base_text + f"\n\n⏰ Snoozed to {new_due_at.isoformat()}."
 
-                try:
-                    meta = gmail_client.get_message_metadata(gmail_message_id)
-                except Exception:
-                    logger.exception("Error fetching Gmail metadata for email reminder.")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Failed to read email metadata.",
-                            show_alert=True,
+                    if message_id is not None:
+                        bot.edit_message_text(
+                            chat_id=chat_id,
+                            message_id=message_id,
+                            text=new_text,
+                            reply_markup=None,  # remove keyboard after one snooze
                         )
-                    return "", 200
-
-                subject = meta.get("subject")
-                sender = meta.get("from")
-                recipient = meta.get("original_recipient") or meta.get("to")
-
-                reminder = Reminder(
-                    reminder_id=str(uuid.uuid4()),
-                    source_type="email",
-                    gmail_message_id=gmail_message_id,
-                    subject=subject,
-                    sender=sender,
-                    recipient=recipient,
-                    description=None,
-                    telegram_chat_id=settings.telegram_user_id or chat_id,
-                    due_at=due_at,
-                    status="pending",
-                )
-
-                try:
-                    repo.create_reminder(reminder)
-                except Exception:
-                    logger.exception("Error creating email reminder from callback")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Failed to save reminder.",
-                            show_alert=True,
+                    else:
+                        bot.send_message(
+                            chat_id=chat_id,
+                            text=f"Reminder snoozed to {new_due_at.isoformat()}.",
                         )
-                    return "", 200
-
-                if callback_query_id:
-                    bot.answer_callback_query(
-                        callback_query_id,
-                        text="Email reminder created.",
-                        show_alert=False,
-                    )
-
-                base_text = message.get("text") or ""
-                summary_subject = subject or "(no subject)"
 
-                if base_text:
-                    new_text = base_text + f"\n\n✅ Reminder created for {due_at.isoformat()}."
-                else:
-                    new_text = (
-                        f"Reminder created for {due_at.isoformat()} "
-                        f"for email:\n{summary_subject}"
-                    )
-
-                if message_id is not None:
-                    bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        text=new_text,
-                        reply_markup=None,  # remove keyboard
-                    )
-                else:
-                    bot.send_message(
-                        chat_id=chat_id,
-                        text=new_text,
-                    )
-
-                return "", 200
+                    return "", 200
 
-            # ------- reminder_extend:... -> snooze an existing reminder or enter custom flow ------- #
-            if data.startswith("reminder_extend:"):
-                # format: reminder_extend:<reminder_id>:<key>
-                parts = data.split(":", 2)
-                if len(parts) != 3:
+                case ["reminder_extend", *_]:
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
@@ -996,135 +1356,55 @@ def create_app() -> Flask:
                         )
                     return "", 200
 
-                _, reminder_id, offset_key = parts
-
-                if repo is None:
-                    logger.error("Sheets repo not configured; cannot update reminder.")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Storage not configured.",
-                            show_alert=True,
-                        )
-                    return "", 200
-
-                # --- NEW: custom snooze path --- #
-                if offset_key == "custom":
-                    base_text = message.get("text") or "Reminder"
+                # ------- reminder_complete:... -> delete reminder ------- #
+                case ["reminder_complete", reminder_id]:
+                    # format: reminder_complete:<reminder_id>
+                    if repo is None:
+                        logger.error("Sheets repo not configured; cannot delete reminder.")
+                        if callback_query_id:
+                            bot.answer_callback_query(
+                                callback_query_id,
+                                text="Storage not configured.",
+                                show_alert=True,
+                            )
+                        return "", 200
 
-                    # Seed state so the next text message is interpreted as custom datetime
-                    custom_datetime_state[chat_id] = {
-                        "mode": "snooze",
-                        "reminder_id": reminder_id,
-                        "original_chat_id": chat_id,
-                        "original_message_id": message_id,
-                        "original_text": base_text,
-                        # prompt_message_id will be filled after sending prompt
-                    }
+                    deleted = safe_call(
+                        "Error deleting reminder",
+                        notify_failure("Failed to delete reminder."),
+                    )(repo.delete_reminder)(reminder_id)
+                    if deleted is CALL_FAILED:
+                        return "", 200
 
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
-                            text="Send a custom date/time.",
+                            text="Reminder completed." if deleted else "Reminder not found.",
                             show_alert=False,
                         )
 
-                    cancel_keyboard = bot.build_custom_datetime_cancel_keyboard("snooze")
-
-                    sent = bot.send_message(
-                        chat_id=chat_id,
-                        text=(
-                            "Send a new date/time for this reminder in "
-                            "DD/MM/YYYY HH:MM (e.g. 25/12/2025 14:30)."
-                        ),
-                        reply_markup=cancel_keyboard,
-                    )
+                    if not deleted:
+                        return "", 200
 
-                    # Capture prompt_message_id so we can clean it up later
-                    try:
-                        if isinstance(sent, dict):
-                            prompt_message_id = sent.get("message_id")
-                        else:
-                            prompt_message_id = getattr(sent, "message_id", None)
+                    base_text = message.get("text") or "Reminder"
+                    new_text = base_text + "\n\n✅ Reminder marked as complete and removed."
 
-                        if prompt_message_id is not None:
-                            state_custom = custom_datetime_state.get(chat_id) or {}
-                            state_custom["prompt_message_id"] = prompt_message_id
-                            state_custom["prompt_chat_id"] = chat_id
-                            custom_datetime_state[chat_id] = state_custom
-                    except Exception:
-                        logger.exception(
-                            "Failed to capture prompt_message_id for snooze custom datetime."
+                    if message_id is not None:
+                        bot.edit_message_text(
+                            chat_id=chat_id,
+                            message_id=message_id,
+                            text=new_text,
+                            reply_markup=None,  # remove keyboard
                         )
-
-                    return "", 200
-
-                # --- Existing fixed-offset snooze (+1h, +1d, +3d, +1w) --- #
-                delta = offset_key_to_delta(offset_key)
-                if delta is None:
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Unknown offset.",
-                            show_alert=False,
+                    else:
+                        bot.send_message(
+                            chat_id=chat_id,
+                            text="Reminder marked as complete and removed.",
                         )
-                    return "", 200
 
-                tz = ZoneInfo(settings.timezone)
-                now = datetime.now(tz)
-                new_due_at = now + delta
-
-                try:
-                    updated = repo.update_reminder_due_at(reminder_id, new_due_at)
-                except Exception:
-                    logger.exception("Error updating reminder due_at")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Failed to snooze reminder.",
-                            show_alert=True,
-                        )
                     return "", 200
 
-                if not updated:
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Reminder not found.",
-                            show_alert=False,
-                        )
-                    return "", 200
-
-                if callback_query_id:
-                    bot.answer_callback_query(
-                        callback_query_id,
-                        text="Reminder snoozed.",
-                        show_alert=False,
-                    )
-
-                base_text = message.get("text") or "Reminder"
-                new_text = base_text + f"\n\n⏰ Snoozed to {new_due_at.isoformat()}."
-
-                if message_id is not None:
-                    bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        text=new_text,
-                        reply_markup=None,  # remove keyboard after one snooze
-                    )
-                else:
-                    bot.send_message(
-                        chat_id=chat_id,
-                        text=f"Reminder snoozed to {new_due_at.isoformat()}.",
-                    )
-
-                return "", 200
-
-            # ------- reminder_complete:... -> delete reminder ------- #
-            if data.startswith("reminder_complete:"):
-                # format: reminder_complete:<reminder_id>
-                parts = data.split(":", 1)
-                if len(parts) != 2:
+                case ["reminder_complete", *_]:
                     if callback_query_id:
                         bot.answer_callback_query(
                             callback_query_id,
@@ -1133,58 +1413,6 @@ def create_app() -> Flask:
                         )
                     return "", 200
 
-                _, reminder_id = parts
-
-                if repo is None:
-                    logger.error("Sheets repo not configured; cannot delete reminder.")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Storage not configured.",
-                            show_alert=True,
-                        )
-                    return "", 200
-
-                try:
-                    deleted = repo.delete_reminder(reminder_id)
-                except Exception:
-                    logger.exception("Error deleting reminder")
-                    if callback_query_id:
-                        bot.answer_callback_query(
-                            callback_query_id,
-                            text="Failed to delete reminder.",
-                            show_alert=True,
-                        )
-                    return "", 200
-
-                if callback_query_id:
-                    bot.answer_callback_query(
-                        callback_query_id,
-                        text="Reminder completed." if deleted else "Reminder not found.",
-                        show_alert=False,
-                    )
-
-                if not deleted:
-                    return "", 200
-
-                base_text = message.get("text") or "Reminder"
-                new_text = base_text + "\n\n✅ Reminder marked as complete and removed."
-
-                if message_id is not None:
-                    bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        text=new_text,
-                        reply_markup=None,  # remove keyboard
-                    )
-                else:
-                    bot.send_message(
-                        chat_id=chat_id,
-                        text="Reminder marked as complete and removed.",
-                    )
-
-                return "", 200
-
             # Other callback types (for future flows) fall through
             return "", 200
 
@@ -1213,7 +1441,7 @@ def create_app() -> Flask:
             )
 
         # Use the app timezone (Asia/Singapore by default)
-        tz = ZoneInfo(app.config["SETTINGS"].timezone)
+        tz = app.config["TZ"]
         now = datetime.now(tz)
         due_at = now - timedelta(minutes=1) # set the timing to 1 minute in the past so i can instantly get the notif
 
@@ -1263,7 +1491,7 @@ def create_app() -> Flask:
                 500,
             )
 
-        tz = ZoneInfo(app.config["SETTINGS"].timezone)
+        tz = app.config["TZ"]
         now = datetime.now(tz)
 
         try:
@@ -1398,7 +1626,9 @@ def create_app() -> Flask:
 
     @app.route("/debug/setup-gmail-watch", methods=["POST"])
     def debug_setup_gmail_watch():
-        resp = app.config["GMAIL_CLIENT"].setup_watch()
+        resp = app.config["GMAIL_CLIENT"].setup_watch(
+            label_ids=[settings.gmail_watch_label_id] if settings.gmail_watch_label_id else None,
+        )
         return jsonify(
             {
                 "ok": True,
@@ -1459,58 +1689,24 @@ def create_app() -> Flask:
             }
         ), 200
 
-    @app.route("/gmail-webhook", methods=["POST"])
-    def gmail_webhook():
+    def process_gmail_notification(email_address: Any, history_id: Any) -> dict[str, Any]:
         """
-        Gmail Pub/Sub push endpoint.
-
-        Step 1 behaviour (this step):
-          - Decode Pub/Sub envelope
-          - Extract emailAddress + historyId
+        Do the actual work for one Gmail push notification (runs on the gmail-worker thread):
           - Use LAST_HISTORY_ID from app.config:
               * If None -> bootstrap: set LAST_HISTORY_ID = historyId, do nothing else.
               * Else    -> call Gmail history API for changes since LAST_HISTORY_ID,
-                           log new message IDs, then update LAST_HISTORY_ID.
-          - Always return 200 so Pub/Sub doesn’t retry.
+                           then update LAST_HISTORY_ID (persisted by the flusher thread).
+          - Fetch metadata for new messages, keep allowed senders, send Telegram cards.
 
-        NOTE: No Telegram sends, no sender filter yet.
+        Returns a summary dict (logged by the worker).
         """
         gmail_client: GmailClient | None = app.config.get("GMAIL_CLIENT")
         bot: TelegramBot | None = app.config.get("TELEGRAM_BOT")
         settings: Settings = app.config["SETTINGS"]
-        repo: ReminderSheetRepository | None = app.config.get("REMINDER_REPO")
 
         if gmail_client is None:
-            logger.error("Gmail client not configured; cannot process Gmail webhook.")
-            return jsonify({"ok": False, "error": "gmail_client_not_configured"}), 200
-
-        envelope = request.get_json(silent=True) or {}
-        logger.info("Received Pub/Sub envelope: %s", envelope)
-
-        message = envelope.get("message") or {}
-        data_b64 = message.get("data")
-
-        if not data_b64:
-            logger.warning("Pub/Sub message missing 'data'; ignoring.")
-            return jsonify({"ok": True, "ignored": True, "reason": "no data"}), 200
-
-        # Decode inner Gmail notification
-        try:
-            payload_bytes = base64.b64decode(data_b64)
-            payload_str = payload_bytes.decode("utf-8")
-            gmail_notification = json.loads(payload_str)
-        except Exception:
-            logger.exception("Failed to decode/parse Gmail Pub/Sub data")
-            return jsonify({"ok": False, "error": "decode_failed"}), 200
-
-        email_address = gmail_notification.get("emailAddress")
-        history_id = gmail_notification.get("historyId")
-
-        logger.info(
-            "Gmail push notification: emailAddress=%s, historyId=%s",
-            email_address,
-            history_id,
-        )
+            logger.error("Gmail client not configured; cannot process Gmail notification.")
+            return {"ok": False, "error": "gmail_client_not_configured"}
 
         # In-memory last processed historyId
         last_history_id = app.config.get("LAST_HISTORY_ID")
@@ -1522,45 +1718,50 @@ def create_app() -> Flask:
                 "Bootstrapping LAST_HISTORY_ID to %s (no history processed this time).",
                 history_id,
             )
+            # Persisted to the Config sheet by the history-id flusher
 
-            # Persist bootstrap value via repo if available
-            if repo is not None and history_id is not None:
-                try:
-                    repo.write_config_value("last_history_id", str(history_id))
-                except Exception:
-                    logger.exception(
-                        "Failed to persist bootstrap last_history_id=%s to Config sheet",
-                        history_id,
-                    )
-
-            return jsonify(
-                {
-                    "ok": True,
-                    "mode": "bootstrap",
-                    "emailAddress": email_address,
-                    "historyId": history_id,
-                }
-            ), 200
+            return {
+                "ok": True,
+                "mode": "bootstrap",
+                "emailAddress": email_address,
+                "historyId": history_id,
+            }
 
         # 2) Subsequent calls: list new messages since last_history_id
         try:
             new_message_ids, latest_history_id = gmail_client.list_new_message_ids_since(
                 start_history_id=str(last_history_id),
-                # keep default label_ids=["INBOX"] inside the method
+                label_ids=app.config["GMAIL_HISTORY_LABEL_IDS"],
+                max_results=GMAIL_MAX_MESSAGES_PER_PUSH,
             )
         except Exception as e:
-            logger.exception("Error while listing Gmail history in /gmail-webhook")
+            logger.exception("Error while listing Gmail history for Gmail push")
             # Do NOT change LAST_HISTORY_ID on error.
-            return jsonify(
-                {
-                    "ok": False,
-                    "error": str(e),
-                    "emailAddress": email_address,
-                    "historyId": history_id,
-                }
-            ), 200
+            return {
+                "ok": False,
+                "error": str(e),
+                "emailAddress": email_address,
+                "historyId": history_id,
+            }
 
-        logger.info(
+        if latest_history_id is None:
+            # LAST_HISTORY_ID fell out of Gmail's history window (e.g. after a long outage):
+            # re-bootstrap from this push so the next one works again instead of failing forever.
+            app.config["LAST_HISTORY_ID"] = history_id
+            logger.warning(
+                "last_history_id=%s has expired in Gmail; re-bootstrapping LAST_HISTORY_ID to %s. "
+                "Mail received in between is not sent to Telegram.",
+                last_history_id,
+                history_id,
+            )
+            return {
+                "ok": True,
+                "mode": "resync",
+                "emailAddress": email_address,
+                "historyId": history_id,
+            }
+
+        logger.debug(
             "History diff: last_history_id=%s, new_message_ids=%s, latest_history_id=%s",
             last_history_id,
             new_message_ids,
@@ -1571,26 +1772,26 @@ def create_app() -> Flask:
         if latest_history_id is not None and latest_history_id != last_history_id:
             app.config["LAST_HISTORY_ID"] = latest_history_id
             logger.info("Updated LAST_HISTORY_ID to %s", latest_history_id)
-
-            # Persist updated value via repo if available
-            if repo is not None:
-                try:
-                    repo.write_config_value("last_history_id", str(latest_history_id))
-                except Exception:
-                    logger.exception(
-                        "Failed to persist updated last_history_id=%s to Config sheet",
-                        latest_history_id,
-                    )
+            # Persisted to the Config sheet by the history-id flusher
 
         # ---- NEW: fetch metadata + filter by sender email ---- #
         matched_messages: list[dict[str, Any]] = []
+        allowed_senders = app.config.get("ALLOWED_SENDER_SET", frozenset())
 
-        for msg_id in new_message_ids:
-            try:
-                meta = gmail_client.get_message_metadata(msg_id)
-            except Exception:
-                logger.exception(
-                    "Failed to fetch metadata for Gmail message_id=%s in /gmail-webhook",
+        # One batched Gmail request instead of a round-trip per message
+        try:
+            metas = gmail_client.get_messages_metadata_batch(new_message_ids)
+        except Exception:
+            logger.exception(
+                "Failed to batch-fetch metadata for Gmail message_ids=%s",
+                new_message_ids,
+            )
+            metas = [None] * len(new_message_ids)
+
+        for msg_id, meta in zip(new_message_ids, metas):
+            if meta is None:
+                logger.warning(
+                    "Skipping Gmail message_id=%s: metadata could not be fetched",
                     msg_id,
                 )
                 continue
@@ -1599,10 +1800,9 @@ def create_app() -> Flask:
             subject = meta.get("subject") or "(no subject)"
             original_recipient = meta.get("original_recipient")
 
-            # Normalise for case-insensitive substring match
-            allowed_senders = app.config.get("ALLOWED_SENDER_SET", set())
+            # Exact (casefolded) address match against the allowlist set
             if is_sender_allowed(from_header, allowed_senders):
-                logger.info(
+                logger.debug(
                     "Matched allowed sender for message_id=%s: from=%r, subject=%r",
                     msg_id,
                     from_header,
@@ -1617,7 +1817,7 @@ def create_app() -> Flask:
                     }
                 )
             else:
-                logger.info(
+                logger.debug(
                     "Ignoring message_id=%s: sender %r not in allowlist (%d entries)",
                     msg_id,
                     from_header,
@@ -1636,7 +1836,8 @@ def create_app() -> Flask:
                 "TELEGRAM_USER_ID not configured; cannot send notifications for matched messages."
             )
         else:
-            for mm in matched_messages:
+            def build_email_card(mm: dict[str, Any]) -> tuple[int, str, Any]:
+                """(chat_id, text, keyboard) for one 'New email' card."""
                 gmail_message_id = mm["gmail_message_id"]
                 from_header = mm["from"] or "(unknown sender)"
                 subject = mm["subject"] or "(no subject)"
@@ -1653,38 +1854,158 @@ def create_app() -> Flask:
                     text = f"New email\nFrom: {from_header}\nSubject: {subject}"
 
                 keyboard = bot.build_email_action_keyboard(gmail_message_id)
+                return settings.telegram_user_id, text, keyboard
 
-                try:
-                    bot.send_message(
-                        chat_id=settings.telegram_user_id,
-                        text=text,
-                        reply_markup=keyboard,
+            # Send all cards concurrently, then wait for every send before responding
+            results = bot.send_messages([build_email_card(mm) for mm in matched_messages])
+            for mm, result in zip(matched_messages, results):
+                if result is None:
+                    logger.error(
+                        "Failed to send Telegram notification for Gmail message_id=%s",
+                        mm["gmail_message_id"],
                     )
-                    telegram_dispatched += 1
-                    logger.info(
+                else:
+                    logger.debug(
                         "Sent Telegram notification for Gmail message_id=%s",
-                        gmail_message_id,
-                    )
-                except Exception:
-                    logger.exception(
-                        "Failed to send Telegram notification for Gmail message_id=%s",
-                        gmail_message_id,
+                        mm["gmail_message_id"],
                     )
-        # Return a simple json
-        return jsonify(
-            {
-                "ok": True,
-                "mode": "history",
-                "emailAddress": email_address,
-                "push_historyId": history_id,
-                "last_history_id_before": last_history_id,
-                "new_message_ids": new_message_ids,
-                "latest_history_id": latest_history_id,
-                "last_history_id_after": app.config.get("LAST_HISTORY_ID"),
-                "matched_messages": matched_messages,
-                "telegram_dispatched": telegram_dispatched,
-            }
-        ), 200
+            telegram_dispatched = sum(result is not None for result in results)
+
+        # Hit the per-push cap: LAST_HISTORY_ID only advanced to the last record we consumed,
+        # so queue a follow-up to work through the rest without waiting for the next push.
+        more_pending = len(new_message_ids) >= GMAIL_MAX_MESSAGES_PER_PUSH
+        if more_pending:
+            try:
+                gmail_task_queue.put_nowait((email_address, latest_history_id))
+            except queue.Full:
+                logger.warning("Gmail task queue full; remaining history waits for the next push")
+
+        return {
+            "ok": True,
+            "mode": "history",
+            "emailAddress": email_address,
+            "push_historyId": history_id,
+            "last_history_id_before": last_history_id,
+            "new_message_ids": new_message_ids,
+            "latest_history_id": latest_history_id,
+            "last_history_id_after": app.config.get("LAST_HISTORY_ID"),
+            "matched_messages": matched_messages,
+            "telegram_dispatched": telegram_dispatched,
+            "more_pending": more_pending,
+        }
+
+    # Pushes are queued by /gmail-webhook and processed here, one at a time, so the endpoint can
+    # ACK Pub/Sub immediately. A single consumer also keeps LAST_HISTORY_ID updates ordered.
+    gmail_task_queue: "queue.Queue[tuple[Any, Any]]" = queue.Queue(maxsize=GMAIL_TASK_QUEUE_MAXSIZE)
+    app.config["GMAIL_TASK_QUEUE"] = gmail_task_queue
+
+    def gmail_worker() -> None:
+        while True:
+            email_address, history_id = gmail_task_queue.get()
+            try:
+                summary = process_gmail_notification(email_address, history_id)
+                logger.info(
+                    "Processed Gmail push historyId=%s: ok=%s mode=%s dispatched=%s",
+                    history_id,
+                    summary.get("ok"),
+                    summary.get("mode"),
+                    summary.get("telegram_dispatched"),
+                )
+            except Exception:
+                logger.exception("Unhandled error processing Gmail push historyId=%s", history_id)
+            finally:
+                gmail_task_queue.task_done()
+
+    threading.Thread(target=gmail_worker, name="gmail-worker", daemon=True).start()
+
+
+    @app.route("/gmail-webhook", methods=["POST"])
+    def gmail_webhook():
+        """
+        Gmail Pub/Sub push endpoint.
+
+        Behaviour:
+          - Decode Pub/Sub envelope
+          - Extract emailAddress + historyId
+          - Queue them for the gmail-worker thread (see process_gmail_notification)
+          - Always return 200 right away so Pub/Sub doesn’t retry or time out
+            (except 401 for a bad push token when PUBSUB_PUSH_AUDIENCE is set).
+        """
+        gmail_client: GmailClient | None = app.config.get("GMAIL_CLIENT")
+
+        # Authenticated push: reject forged envelopes before touching the body, Gmail or Sheets
+        if settings.pubsub_push_audience and not verify_pubsub_push_token(
+            request.headers.get("Authorization"),
+            audience=settings.pubsub_push_audience,
+            service_account_email=settings.pubsub_push_service_account,
+        ):
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        if gmail_client is None:
+            logger.error("Gmail client not configured; cannot process Gmail webhook.")
+            return jsonify({"ok": False, "error": "gmail_client_not_configured"}), 200
+
+        # Cheap checks before parsing: oversized bodies, non-objects and bodies without a
+        # "data" field can't be a Gmail push, so ack them without running the JSON parser.
+        # A chunked body has no Content-Length, so the read itself is bounded as well.
+        if (request.content_length or 0) > MAX_PUBSUB_ENVELOPE_BYTES:
+            logger.warning("Pub/Sub body too large (%s bytes); ignoring.", request.content_length)
+            return jsonify({"ok": True, "ignored": True, "reason": "too large"}), 200
+
+        raw = request.stream.read(MAX_PUBSUB_ENVELOPE_BYTES + 1)
+        if len(raw) > MAX_PUBSUB_ENVELOPE_BYTES:
+            logger.warning(
+                "Pub/Sub body too large (over %d bytes); ignoring.", MAX_PUBSUB_ENVELOPE_BYTES
+            )
+            return jsonify({"ok": True, "ignored": True, "reason": "too large"}), 200
+
+        if not raw.lstrip().startswith(b"{") or b'"data"' not in raw:
+            logger.warning("Pub/Sub message missing 'data'; ignoring.")
+            return jsonify({"ok": True, "ignored": True, "reason": "no data"}), 200
+
+        # Parse the raw body as bytes; json.loads accepts bytes directly, no str copy needed
+        try:
+            envelope = json.loads(raw)
+        except ValueError:
+            envelope = {}
+        logger.debug("Received Pub/Sub envelope: %s", envelope)
+
+        message = envelope.get("message") or {}
+        data_b64 = message.get("data")
+
+        if not data_b64:
+            logger.warning("Pub/Sub message missing 'data'; ignoring.")
+            return jsonify({"ok": True, "ignored": True, "reason": "no data"}), 200
+
+        # Decode inner Gmail notification
+        try:
+            payload_bytes = base64.b64decode(data_b64)
+            gmail_notification = json.loads(payload_bytes)
+        except Exception:
+            logger.exception("Failed to decode/parse Gmail Pub/Sub data")
+            return jsonify({"ok": False, "error": "decode_failed"}), 200
+
+        email_address = gmail_notification.get("emailAddress")
+        history_id = gmail_notification.get("historyId")
+
+        logger.info(
+            "Gmail push notification: emailAddress=%s, historyId=%s",
+            email_address,
+            history_id,
+        )
+
+        try:
+            gmail_task_queue.put_nowait((email_address, history_id))
+        except queue.Full:
+            # Safe to drop: the next push diffs history from LAST_HISTORY_ID and picks these up
+            logger.error(
+                "Gmail task queue full (%d); dropping push historyId=%s",
+                GMAIL_TASK_QUEUE_MAXSIZE,
+                history_id,
+            )
+            return jsonify({"ok": False, "error": "queue_full", "historyId": history_id}), 200
+
+        return jsonify({"ok": True, "queued": True, "historyId": history_id}), 200
 
     @app.route("/dispatch-due-reminders", methods=["GET", "POST"])
     def dispatch_due_reminders():
@@ -1725,18 +2046,17 @@ def create_app() -> Flask:
                 500,
             )
 
-        tz = ZoneInfo(settings.timezone)
+        tz = app.config["TZ"]
         now = datetime.now(tz)
 
         try:
-            due_reminders = repo.get_due_reminders(now)
+            due_reminders = repo.get_due_reminders_fast(now)
         except Exception as e:
             logger.exception("Error fetching due reminders")
             return jsonify({"ok": False, "error": str(e)}), 500
 
-        dispatched = 0
-
-        for r in due_reminders:
+        def build_reminder_message(r: Reminder) -> tuple[int, str, Any]:
+            """(chat_id, text, keyboard) for one due reminder."""
             # Decide what text to show
             if r.source_type == "email":
                 subject = r.subject or "(no subject)"
@@ -1750,36 +2070,39 @@ def create_app() -> Flask:
             keyboard = bot.build_reminder_control_keyboard(r.reminder_id)
 
             chat_id = r.telegram_chat_id or (settings.telegram_user_id or 0)
-
-            try:
-                bot.send_message(
-                    chat_id=chat_id,
-                    text=text,
-                    reply_markup=keyboard,
-                )
-                dispatched += 1
-
-                # Mark as notified so we don't send it again
-                try:
-                    updated = repo.update_reminder_status(r.reminder_id, "notified")
-                    if not updated:
-                        logger.warning(
-                            "Failed to update status to 'notified' for reminder_id=%s",
-                            r.reminder_id,
-                        )
-                except Exception:
-                    logger.exception(
-                        "Error updating reminder status to 'notified' for %s",
-                        r.reminder_id,
-                    )
-
-            except Exception:
-                logger.exception(
+            return chat_id, text, keyboard
+
+        # Send all due reminders concurrently
+        messages = [build_reminder_message(r) for r in due_reminders]
+        results = bot.send_messages(messages)
+        sent: list[Reminder] = []
+        for r, (chat_id, _, _), result in zip(due_reminders, messages, results):
+            if result is None:
+                logger.error(
                     "Error sending reminder %s to chat_id %s",
                     r.reminder_id,
                     chat_id,
                 )
-                # continue to next reminder
+            else:
+                sent.append(r)
+        dispatched = len(sent)
+
+        # Mark everything we sent as notified (one Sheets write) so it isn't sent again.
+        # The repo re-checks the row numbers first, since rows may have moved during the sends.
+        try:
+            missing = repo.batch_update_reminder_statuses(
+                [(r, "notified") for r in sent]
+            )
+            for reminder_id in missing:
+                logger.warning(
+                    "Failed to update status to 'notified' for reminder_id=%s",
+                    reminder_id,
+                )
+        except Exception:
+            logger.exception(
+                "Error updating reminder statuses to 'notified' for %s",
+                [r.reminder_id for r in sent],
+            )
 
         return jsonify(
             {
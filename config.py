@@ -1,5 +1,6 @@
 import logging
 import os  # gives access to environment variables via os.getenv
+import re
 from dataclasses import dataclass  # helper that auto-generates boilerplate methods for simple classes
 from typing import Optional  # lets us express "this can be a type OR None", e.g. Optional[str]
 from dotenv import load_dotenv
@@ -8,6 +9,9 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# One email per line: something@something, with no whitespace and a single '@'
+_EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+$")
+
 
 def parse_allowed_sender_emails(raw: Optional[str]) -> list[str]:
     """
@@ -31,23 +35,19 @@ def parse_allowed_sender_emails(raw: Optional[str]) -> list[str]:
     # Normalise line endings: convert Windows (\r\n) / old Mac (\r) to Unix (\n)
     normalised = raw.replace("\r\n", "\n").replace("\r", "\n")
 
-    allowed: list[str] = []  # Final list of cleaned email addresses
-    seen: set[str] = set()   # Set used to avoid duplicates
+    valid: list[str] = []  # Cleaned email addresses, in input order (may contain duplicates)
 
     # Split the string into individual lines (one potential email per line)
     for line in normalised.split("\n"):
-        # Remove leading and trailing spaces from the line
-        email = line.strip()
+        # Trim and lowercase so comparisons are case-insensitive
+        email = line.strip().casefold()
 
         # Skip completely empty lines
         if not email:
             continue
 
-        # Normalise to lowercase so comparisons are case-insensitive
-        email = email.casefold()
-
-        # Very simple validation: must contain '@' and no spaces
-        if "@" not in email or " " in email:
+        # Very simple validation: exactly one '@' and no whitespace
+        if not _EMAIL_RE.match(email):
             # Log and skip anything that doesn't look like a basic email
             logger.warning(
                 "Ignoring invalid sender address in ALLOWED_SENDER_EMAILS: %s",
@@ -55,10 +55,10 @@ def parse_allowed_sender_emails(raw: Optional[str]) -> list[str]:
             )
             continue
 
-        # Only add the email if we have not seen it before
-        if email not in seen:
-            allowed.append(email)  # Add to final list
-            seen.add(email)        # Mark as seen to prevent duplicates
+        valid.append(email)
+
+    # dict.fromkeys drops duplicates while keeping the first-seen order
+    allowed = list(dict.fromkeys(valid))
 
     # If after parsing everything we ended up with no valid emails, treat it as misconfig
     if not allowed:
@@ -67,8 +67,10 @@ def parse_allowed_sender_emails(raw: Optional[str]) -> list[str]:
     # Return the cleaned list of allowed sender email addresses
     return allowed
 
-@dataclass  # transforms the Settings class below into a "data class" with an auto-generated __init__, etc.
-@dataclass
+# transforms the Settings class below into a "data class" with an auto-generated __init__, etc.
+# frozen: settings are read-only after load, so threads can share them safely;
+# slots: no per-instance __dict__, so attribute reads are a direct slot lookup
+@dataclass(frozen=True, slots=True)
 class Settings:
     # Telegram
     telegram_bot_token: Optional[str]
@@ -82,6 +84,15 @@ class Settings:
     gmail_user_id: str  # keep this; may be useful later
     # NEW: raw JSON string from gmail_token.json
     gmail_oauth_token_json: Optional[str]
+    # Optional label applied by a Gmail filter (from:(a@x.com OR b@y.com)) to allowed senders.
+    # When set, only messages with this label are picked up from the history diff.
+    gmail_watch_label_id: Optional[str]
+
+    # Pub/Sub push authentication (optional). When the audience is set, /gmail-webhook only
+    # accepts pushes carrying a Google-signed ID token for it (and for the service account,
+    # if that is set too).
+    pubsub_push_audience: Optional[str]
+    pubsub_push_service_account: Optional[str]
 
     # General
     timezone: str
@@ -115,6 +126,9 @@ def load_settings() -> Settings:
         google_service_account_json=os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON"),
         gmail_user_id=os.getenv("GMAIL_USER_ID", "me"),
         gmail_oauth_token_json=os.getenv("GMAIL_OAUTH_TOKEN_JSON"),
+        gmail_watch_label_id=os.getenv("GMAIL_WATCH_LABEL_ID") or None,
+        pubsub_push_audience=os.getenv("PUBSUB_PUSH_AUDIENCE") or None,
+        pubsub_push_service_account=os.getenv("PUBSUB_PUSH_SERVICE_ACCOUNT") or None,
         timezone=os.getenv("APP_TIMEZONE", "Asia/Singapore"),
         webhook_url=os.getenv("WEBHOOK_URL"),
         target_sender_email=target_sender_email,
@@ -1,14 +1,62 @@
+import functools
 import json
 import logging, base64, re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Dict, List
 
+import httplib2
+from cachetools import LRUCache
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 # We requested this scope in gmail_oauth_setup.py
 GMAIL_SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
+# Gmail accepts at most 100 calls per batch HTTP request
+GMAIL_BATCH_LIMIT = 100
+
+# Socket timeout for Gmail API calls; httplib2's default is to wait forever
+GMAIL_HTTP_TIMEOUT_SECONDS = 30
+
+# Partial response for messages.get(format="full"): top-level headers plus the MIME tree's
+# types and inline data, which is all _parse_message_metadata reads. Skips snippet, labelIds,
+# sizes, per-part headers, etc. (parts nested deeper than two levels still come back whole).
+GMAIL_METADATA_FIELDS = (
+    "payload(headers(name,value),mimeType,body/data,"
+    "parts(mimeType,body/data,parts))"
+)
+
+# Forwarded-block parsing (see _extract_original_recipient_from_body). The marker is matched
+# anywhere and case-insensitively, so Gmail's "---------- Forwarded message ---------" and
+# Apple Mail's "Begin forwarded message:" both count.
+_FORWARDED_MARKER_RE = re.compile(r"forwarded message", re.IGNORECASE)
+_TO_LINE_RE = re.compile(r"^To:\s*(.+)$", re.MULTILINE)
+# Subject prefixes mail clients add when forwarding (English, French, German, Spanish,
+# Portuguese, Italian), possibly behind reply prefixes ("Re: Fwd: ...", "AW: WG: ...").
+# Without one there is no forwarded block, so the body isn't decoded.
+_FWD_SUBJECT_RE = re.compile(
+    r"^\s*(?:(?:re|aw|sv|antw)\s*:\s*)*(fwd?|tr|wg|rv|enc|i)\s*:",
+    re.IGNORECASE,
+)
+
+# MIME parts that can never be (or contain) a text/plain body; _get_plain_text skips them
+# without looking inside (attachments, inline images, the HTML alternative).
+_NON_TEXT_MIME_PREFIXES = ("image/", "audio/", "video/", "application/", "font/", "text/html")
+
+# Extra attempts for a Gmail call that hits 429 / 5xx / a connection error. googleapiclient
+# sleeps with randomised exponential backoff (up to 2**n seconds) between attempts.
+GMAIL_NUM_RETRIES = 3
+
+# Parallel messages.get calls used when a batch request (or some of its parts) fails
+GMAIL_FALLBACK_WORKERS = 10
+
+# Labels rarely change; list_labels() serves a cached copy for this long
+LABELS_CACHE_TTL_SECONDS = 300
+
 # Set up a logger for tracking
 logger = logging.getLogger(__name__)
 
@@ -35,55 +83,124 @@ class GmailClient:
         # Passing scopes ensures they’re set even if missing in the JSON.
         creds = Credentials.from_authorized_user_info(token_info, scopes=GMAIL_SCOPES)
 
+        # Long-lived authorised transports: httplib2 keeps the TLS connection to
+        # gmail.googleapis.com open between calls, so we don't re-handshake every request.
+        # httplib2.Http isn't thread-safe, so every call goes through _thread_http() (one warm
+        # transport per thread); self.http is only the default that build() requires.
+        self.http = AuthorizedHttp(creds, http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT_SECONDS))
+        self._creds = creds
+        self._thread_local = threading.local()
+        self._fallback_executor = ThreadPoolExecutor(
+            max_workers=GMAIL_FALLBACK_WORKERS,
+            thread_name_prefix="gmail-fetch",
+        )
+
+        # static_discovery: use the discovery doc bundled with google-api-python-client
+        # instead of fetching it over the network on every build().
         self.service = build(
             "gmail",
             "v1",
-            credentials=creds,
+            http=self.http,
             cache_discovery=False,
+            static_discovery=True,
         )
+        # Each .users() / .messages() / ... call builds a new Resource from the discovery doc;
+        # build the ones we use once and reuse them for every request.
+        self._users = self.service.users()
+        self._messages = self._users.messages()
+        self._history = self._users.history()
+        self._labels = self._users.labels()
         self.topic_name = "projects/email-reminders-bot/topics/gmail-push-topic"
 
+        # message_id -> get_message_metadata() dict. Headers/body of a message never change,
+        # and the same id can come back via overlapping history windows or callback buttons.
+        self._metadata_cache: LRUCache = LRUCache(maxsize=2048)
+        self._metadata_cache_lock = threading.Lock()  # LRUCache is not thread-safe
+
+        # message_id -> Future of a get_message_metadata() call that is already running, so
+        # concurrent callers for the same message share one request instead of racing two.
+        self._inflight: dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # (fetched_at monotonic time, labels) from the last list_labels() call
+        self._labels_cache: tuple[float, List[Dict[str, Any]]] | None = None
+
+    def _thread_http(self) -> AuthorizedHttp:
+        """Authorised transport for the calling thread (httplib2.Http is not thread-safe)."""
+        http = getattr(self._thread_local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(
+                self._creds,
+                http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT_SECONDS),
+            )
+            self._thread_local.http = http
+        return http
+
+    def _cached_metadata(self, message_id: str) -> dict | None:
+        with self._metadata_cache_lock:
+            meta = self._metadata_cache.get(message_id)
+        # Hand out copies so callers can't mutate the cached entry
+        return dict(meta) if meta is not None else None
+
+    def _cache_metadata(self, message_id: str, meta: dict) -> None:
+        with self._metadata_cache_lock:
+            self._metadata_cache[message_id] = dict(meta)
+
     def _get_plain_text(self, payload: dict) -> str | None:
         """
         Walk the Gmail payload tree and return the first text/plain body as a string.
         This only returns the plain body text of the email, and is a simple decoder.
-        """
-        # payload = one MIME part from Gmail (mimeType, body, maybe parts, etc.)
-        if not payload:
-            return None
-
-        # Content type of this part, e.g. "text/plain", "text/html", "multipart/alternative"
-        mime_type = payload.get("mimeType")
 
-        # "body" holds the raw data for this part (if it is a leaf)
-        body = payload.get("body") or {}
-        # Base64url-encoded content for this part (if present)
-        data = body.get("data")
-
-        # Case 1: this part is a simple text/plain part with data
-        if mime_type == "text/plain" and data:
-            try:
-                # Gmail uses base64url without padding; add "===" so the decoder accepts it
-                decoded_bytes = base64.urlsafe_b64decode(data + "===")
-                # Convert bytes -> string using UTF-8; invalid bytes become � instead of crashing
-                return decoded_bytes.decode("utf-8", errors="replace")
-            except Exception:
-                logger.exception("Failed to decode text/plain body")
-                return None
-
-        # Case 2: multipart container – look inside its child parts
-        parts = payload.get("parts") or []  # parts is a list of child payload dicts.
-        for part in parts:
-            # Recursive call: try to extract text/plain from this child part
-            text = self._get_plain_text(part)
-            if text:
-                # As soon as we find any plain text body, return it
-                return text
-
-        # No text/plain found in this part or its children
+        Depth-first, in document order, using an explicit stack rather than recursion.
+        """
+        # Parts still to visit; children are pushed reversed so the first child is popped first
+        stack = [payload]
+
+        while stack:
+            # part = one MIME part from Gmail (mimeType, body, maybe parts, etc.)
+            part = stack.pop()
+            if not part:
+                continue
+
+            # Content type of this part, e.g. "text/plain", "text/html", "multipart/alternative"
+            mime_type = part.get("mimeType") or ""
+
+            # Attachments / HTML: nothing for us in here, don't walk or decode it
+            if mime_type.startswith(_NON_TEXT_MIME_PREFIXES):
+                continue
+
+            # "body" holds the raw data for this part (if it is a leaf)
+            body = part.get("body") or {}
+            # Base64url-encoded content for this part (if present)
+            data = body.get("data")
+
+            # Case 1: this part is a simple text/plain part with data
+            if mime_type == "text/plain" and data:
+                try:
+                    # Gmail uses base64url without padding; add "===" so the decoder accepts it
+                    decoded_bytes = base64.urlsafe_b64decode(data + "===")
+                    # Convert bytes -> string using UTF-8; invalid bytes become � instead of crashing
+                    text = decoded_bytes.decode("utf-8", errors="replace")
+                except Exception:
+                    logger.exception("Failed to decode text/plain body")
+                    text = None
+                if text:
+                    # As soon as we find any plain text body, return it
+                    return text
+
+            # Case 2: multipart container – visit its child parts next, in order
+            parts = part.get("parts")  # parts is a list of child payload dicts.
+            if parts:
+                stack.extend(reversed(parts))
+
+        # No text/plain found anywhere in the tree
         return None
 
-    def _extract_original_recipient_from_body(self, message: dict) -> str | None:
+    def _extract_original_recipient_from_body(
+        self,
+        message: dict,
+        subject: str | None = None,
+    ) -> str | None:
         """
         This is the highly specialised function for our use-case, to “dig To: out of a forwarded block”
         For manually forwarded Gmail emails, the original message headers
@@ -97,49 +214,71 @@ class GmailClient:
 
         We decode the text/plain content and look for a 'To:' line.
         Returns the first such value found, or None if not found.
+
+        If subject is given (non-empty) and has no forward prefix (Fwd:, FW:, TR:, WG:, ...,
+        optionally after Re:), we return None without decoding the body at all. A missing or
+        empty subject tells us nothing, so the body is still scanned.
         """
+        if subject and not _FWD_SUBJECT_RE.match(subject):
+            return None
+
         payload = message.get("payload", {})
         text = self._get_plain_text(payload)
         if not text:
             return None
 
         # If there's a forwarded marker, search from there; otherwise search whole body
-        lowered = text.lower()
-        forwarded_idx = lowered.find("forwarded message")
-        search_area = text[forwarded_idx:] if forwarded_idx != -1 else text
-
-        m = re.search(r"^To:\s*(.+)$", search_area, flags=re.MULTILINE)
+        # (no lowercased copy of the body needed: the marker regex is case-insensitive)
+        forwarded = _FORWARDED_MARKER_RE.search(text)
+        m = _TO_LINE_RE.search(text, forwarded.start() if forwarded else 0)
         if not m:
             return None
 
         value = m.group(1).strip()
         return value or None
 
-    def setup_watch(self) -> dict:
+    def setup_watch(self, label_ids: list[str] | None = None) -> dict:
         """
         Start Gmail watch on the mailbox.
         Returns the raw watch response (includes historyId).
+
+        - label_ids: optional; only push for changes to messages with these labels
+          (e.g. the GMAIL_WATCH_LABEL_ID filter label), instead of every mailbox change.
         """
         body = {
             "topicName": self.topic_name,
-            # You can add filters later if you want:
-            # "labelIds": ["INBOX"],
-            # "labelFilterAction": "include",
         }
+        if label_ids:
+            body["labelIds"] = label_ids
+            body["labelFilterAction"] = "include"
 
         resp = (
-            self.service.users()
+            self._users
             .watch(userId="me", body=body)
-            .execute()
+            .execute(http=self._thread_http(), num_retries=GMAIL_NUM_RETRIES)
         )
         # Example resp: {"historyId": "1234567890", "expiration": 1700000000000}
         return resp
 
     def list_labels(self) -> List[Dict[str, Any]]:
-        """Return the list of labels for the authorised user."""
+        """
+        Return the list of labels for the authorised user.
+
+        Cached for LABELS_CACHE_TTL_SECONDS; only id/name/type are requested.
+        """
+        cached = self._labels_cache
+        if cached is not None and time.monotonic() - cached[0] < LABELS_CACHE_TTL_SECONDS:
+            return list(cached[1])
+
         try:
-            resp = self.service.users().labels().list(userId="me").execute()
-            return resp.get("labels", [])
+            resp = (
+                self._labels
+                .list(userId="me", fields="labels(id,name,type)")
+                .execute(http=self._thread_http(), num_retries=GMAIL_NUM_RETRIES)
+            )
+            labels = resp.get("labels", [])
+            self._labels_cache = (time.monotonic(), labels)
+            return list(labels)
         except HttpError as e:
             # Keep logs minimal; no sensitive data.
             print(f"Gmail API error in list_labels: {e}")
@@ -167,7 +306,7 @@ class GmailClient:
             kwargs["q"] = query
 
         try:
-            resp = self.service.users().messages().list(**kwargs).execute()
+            resp = self._messages.list(**kwargs).execute(http=self._thread_http(), num_retries=GMAIL_NUM_RETRIES)
         except HttpError as e:
             print(f"Gmail API error in list_recent_message_ids: {e}")
             raise
@@ -185,18 +324,152 @@ class GmailClient:
             - "to": str | None   (envelope To)
             - "original_recipient": str | None (best guess from forwarded body, if any)
         """
-        # Use "full" so we can inspect the body for forwarded headers
-        msg = (
-            self.service.users()
-            .messages()
-            .get(
-                userId="me",
-                id=message_id,
-                format="full",
+        cached = self._cached_metadata(message_id)
+        if cached is not None:
+            return cached
+
+        with self._inflight_lock:
+            inflight = self._inflight.get(message_id)
+            if inflight is None:
+                future: Future = Future()
+                self._inflight[message_id] = future
+        if inflight is not None:
+            # Someone else is fetching this message right now; wait for their result
+            return dict(inflight.result())
+
+        try:
+            # Use "full" so we can inspect the body for forwarded headers
+            msg = (
+                self._messages
+                .get(
+                    userId="me",
+                    id=message_id,
+                    format="full",
+                    fields=GMAIL_METADATA_FIELDS,
+                )
+                .execute(http=self._thread_http(), num_retries=GMAIL_NUM_RETRIES)
             )
-            .execute()
-        )
 
+            meta = self._parse_message_metadata(msg, message_id)
+            self._cache_metadata(message_id, meta)
+            future.set_result(meta)
+            return meta
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(message_id, None)
+
+    def get_messages_metadata_batch(self, message_ids: list[str]) -> list[dict | None]:
+        """
+        Batched version of get_message_metadata.
+
+        Sends the messages.get calls as Gmail batch HTTP requests (up to GMAIL_BATCH_LIMIT
+        per request) instead of one round-trip per message.
+
+        Returns a list aligned with message_ids: the metadata dict for each message,
+        or None if that particular message could not be fetched.
+        """
+        # Each distinct id is fetched once; request_id is its index in unique_ids, and the
+        # callback writes straight into the preallocated slot for it.
+        unique_ids = list(dict.fromkeys(message_ids))
+        unique_results: list[dict | None] = [None] * len(unique_ids)
+
+        def on_response(request_id: str, response: dict, exception: Exception | None) -> None:
+            idx = int(request_id)
+            message_id = unique_ids[idx]
+            if exception is not None:
+                if _is_retryable_error(exception):
+                    retry.append(idx)
+                else:
+                    logger.error(
+                        "Gmail batch get failed for message_id=%s: %s",
+                        message_id,
+                        exception,
+                    )
+                return
+            meta = self._parse_message_metadata(response, message_id)
+            self._cache_metadata(message_id, meta)
+            unique_results[idx] = meta
+
+        # Indexes to re-fetch one by one: rate-limited / 5xx parts, or whole failed batches
+        retry: list[int] = []
+
+        # Only go to Gmail for ids we haven't already parsed
+        to_fetch: list[int] = []
+        for idx, message_id in enumerate(unique_ids):
+            cached = self._cached_metadata(message_id)
+            if cached is not None:
+                unique_results[idx] = cached
+            else:
+                to_fetch.append(idx)
+
+        for start in range(0, len(to_fetch), GMAIL_BATCH_LIMIT):
+            chunk = to_fetch[start:start + GMAIL_BATCH_LIMIT]
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for idx in chunk:
+                batch.add(
+                    # Still "full": the forwarded-recipient lookup needs the body
+                    self._messages.get(
+                        userId="me",
+                        id=unique_ids[idx],
+                        format="full",
+                        fields=GMAIL_METADATA_FIELDS,
+                    ),
+                    request_id=str(idx),
+                )
+            try:
+                batch.execute(http=self._thread_http())
+            except Exception:
+                logger.exception("Gmail batch request failed; fetching its messages individually")
+                retry.extend(idx for idx in chunk if unique_results[idx] is None)
+
+        if retry:
+            self._fetch_individually(unique_ids, unique_results, list(dict.fromkeys(retry)))
+
+        if len(unique_ids) == len(message_ids):
+            return unique_results
+        position = {message_id: idx for idx, message_id in enumerate(unique_ids)}
+        return [unique_results[position[message_id]] for message_id in message_ids]
+
+    def _fetch_individually(
+        self,
+        unique_ids: list[str],
+        unique_results: list[dict | None],
+        indexes: list[int],
+    ) -> None:
+        """
+        Fallback for get_messages_metadata_batch: fetch the given indexes with concurrent
+        messages.get calls (up to GMAIL_FALLBACK_WORKERS in flight), filling unique_results.
+        """
+
+        def fetch(message_id: str) -> dict:
+            return (
+                self._messages
+                .get(userId="me", id=message_id, format="full", fields=GMAIL_METADATA_FIELDS)
+                .execute(http=self._thread_http(), num_retries=GMAIL_NUM_RETRIES)
+            )
+
+        futures = {
+            idx: self._fallback_executor.submit(fetch, unique_ids[idx])
+            for idx in indexes
+        }
+        for idx, future in futures.items():
+            message_id = unique_ids[idx]
+            try:
+                msg = future.result()
+            except Exception as e:
+                logger.error("Gmail get failed for message_id=%s: %s", message_id, e)
+                continue
+            meta = self._parse_message_metadata(msg, message_id)
+            self._cache_metadata(message_id, meta)
+            unique_results[idx] = meta
+
+    def _parse_message_metadata(self, msg: dict, message_id: str) -> dict:
+        """
+        Build the get_message_metadata() dict from a messages.get(format="full") response.
+        """
         headers = msg.get("payload", {}).get("headers", [])
 
         meta: dict[str, str | None] = {
@@ -205,25 +478,29 @@ class GmailClient:
             "to": None,
         }
 
+        # Header names are case-insensitive; stop scanning once all three are found
+        # (a full message has dozens of Received/DKIM/... headers after these).
+        remaining = 3
         for h in headers:
             name = (h.get("name") or "").lower()
-            value = h.get("value") or ""
-            if name == "subject":
-                meta["subject"] = value
-            elif name == "from":
-                meta["from"] = value
-            elif name == "to":
-                meta["to"] = value
+            if name in meta and meta[name] is None:
+                meta[name] = h.get("value") or ""
+                remaining -= 1
+                if not remaining:
+                    break
 
         # Best-effort extraction of original recipient from forwarded block
-        original_recipient = self._extract_original_recipient_from_body(msg)
+        original_recipient = self._extract_original_recipient_from_body(
+            msg,
+            subject=meta["subject"],
+        )
         if original_recipient:
             meta["original_recipient"] = original_recipient
-            logger.info("Extracted original_recipient=%r for message_id=%s",
+            logger.debug("Extracted original_recipient=%r for message_id=%s",
                         original_recipient, message_id)
         else:
             meta["original_recipient"] = None
-            logger.info("No original_recipient found for message_id=%s", message_id)
+            logger.debug("No original_recipient found for message_id=%s", message_id)
 
         return meta
 
@@ -231,48 +508,60 @@ class GmailClient:
             self,
             start_history_id: str | None,
             label_ids: list[str] | None = None,
+            max_results: int | None = None,
     ) -> tuple[list[str], str | None]:
         """
         Return (message_ids, latest_history_id) based on Gmail history.
 
         - start_history_id: last processed historyId as a string, or None.
         - label_ids: optional list of label IDs to filter on (defaults to ['INBOX']).
+        - max_results: optional soft cap on message_ids (a history record is never split).
+          Once reached we stop paging, and
+          latest_history_id is the last history record we fully consumed, so the next
+          call carries on from there instead of skipping the rest.
 
         message_ids:
             Unique Gmail message IDs for messages added since start_history_id
-            that have at least one of the given labels.
+            that have at least one of the given labels, oldest first.
 
         latest_history_id:
             The latest historyId observed in this call. Persist this and use
             it as start_history_id next time.
+            None means start_history_id is too old (Gmail keeps about a week of
+            history and answers 404); the caller has to re-sync from a fresh historyId.
         """
         if label_ids is None:
             label_ids = ["INBOX"]
+        label_set = frozenset(label_ids)
 
         # If we have no starting history, caller should decide what to do.
         if start_history_id is None:
             return [], None
 
         user_id = "me"
-        all_message_ids: set[str] = set()
+        # dict as an ordered set: unique ids, in the order Gmail reported them (oldest first)
+        all_message_ids: dict[str, None] = {}
         latest_history_id: str | None = None
 
+        list_kwargs: dict[str, Any] = {
+            "userId": user_id,
+            "startHistoryId": start_history_id,
+            "historyTypes": ["messageAdded"],
+        }
+        # history.list accepts a single labelId: with one label, let Gmail drop the rest
+        # server-side. The label check below stays as a safety net (and does the filtering
+        # itself when several labels are wanted).
+        if len(label_set) == 1:
+            list_kwargs["labelId"] = next(iter(label_set))
+
         try:
-            # NOTE: no labelId here; we filter by labels ourselves below
-            request = (
-                self.service.users()
-                .history()
-                .list(
-                    userId=user_id,
-                    startHistoryId=start_history_id,
-                    historyTypes=["messageAdded"],
-                )
-            )
+            request = self._history.list(**list_kwargs)
 
             while request is not None:
-                response = request.execute()
+                response = request.execute(http=self._thread_http(), num_retries=GMAIL_NUM_RETRIES)
 
                 # Collect history records
+                capped = False
                 for history_record in response.get("history", []):
                     # Per-record history id
                     latest_history_id = history_record.get("id", latest_history_id)
@@ -283,9 +572,15 @@ class GmailClient:
                         if not msg_id:
                             continue
 
-                        msg_labels = set(msg.get("labelIds", []))
-                        if msg_labels.intersection(label_ids):
-                            all_message_ids.add(msg_id)
+                        if any(label in label_set for label in msg.get("labelIds", ())):
+                            all_message_ids[msg_id] = None
+
+                    if max_results is not None and len(all_message_ids) >= max_results:
+                        capped = True
+                        break
+
+                if capped:
+                    break
 
                 # Top-level historyId reflects the last record in the range
                 if response.get("historyId"):
@@ -293,22 +588,46 @@ class GmailClient:
 
                 page_token = response.get("nextPageToken")
                 if page_token:
-                    request = (
-                        self.service.users()
-                        .history()
-                        .list(
-                            userId=user_id,
-                            startHistoryId=start_history_id,
-                            historyTypes=["messageAdded"],
-                            pageToken=page_token,
-                        )
-                    )
+                    request = self._history.list(**list_kwargs, pageToken=page_token)
                 else:
                     request = None
 
         except HttpError as e:
             print(f"Gmail API error in list_new_message_ids_since: {e}")
+            if e.resp.status == 404:
+                # Expired startHistoryId: retrying with it will never succeed
+                return [], None
             # Let caller decide how to reset; keep start_history_id as "latest"
             return [], start_history_id
 
-        return sorted(all_message_ids), latest_history_id
\ No newline at end of file
+        return list(all_message_ids), latest_history_id
+
+
+def _is_retryable_error(exception: Exception) -> bool:
+    """True for failures worth another try: rate limits, server errors, transport errors."""
+    if isinstance(exception, HttpError):
+        status = exception.resp.status
+        return status == 429 or status >= 500
+    return True
+
+
+# Held while the singleton is built, so two threads starting up together don't both build one
+_gmail_client_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _build_gmail_client(oauth_token_json: str) -> GmailClient:
+    return GmailClient(oauth_token_json)
+
+
+def get_gmail_client(oauth_token_json: str) -> GmailClient:
+    """
+    Return the process-wide GmailClient for this token JSON, building it on first use.
+
+    Building a client parses the token and the Gmail discovery document, so callers should
+    go through here instead of constructing GmailClient per request.
+
+    Safe to share between threads: every Gmail call runs on a per-thread transport.
+    """
+    with _gmail_client_lock:
+        return _build_gmail_client(oauth_token_json)
@@ -0,0 +1,24 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn is started from the repo root.
+
+Telegram callbacks and Gmail pushes spend almost all their time waiting on Sheets / Gmail /
+Telegram HTTP calls, so a single sync worker serialises every user's button press behind
+the slowest in-flight request. Threaded workers let those waits overlap.
+
+We keep ONE worker process on purpose: the /new and custom datetime flows keep per-chat
+state in memory, and Gmail pushes are drained by a single in-process worker thread (see app.py);
+neither is shared between processes.
+"""
+
+import os
+
+# app.py builds its app (threads, pools, Telegram webhook) on import; serve that one instead of
+# calling create_app() again, which would start everything a second time
+wsgi_app = "app:module_level_app"
+
+worker_class = "gthread"
+workers = 1
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# Sheets calls can be slow on large sheets; don't let gunicorn kill a busy worker too early
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
@@ -1,11 +1,15 @@
 import json
 import logging
-from dataclasses import dataclass
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
 from datetime import datetime, UTC
-from typing import Any, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import gspread
 from google.oauth2.service_account import Credentials
+from gspread.utils import absolute_range_name, rowcol_to_a1
 
 
 logger = logging.getLogger(__name__)
@@ -27,9 +31,77 @@ REMINDER_HEADERS = [
     "status",             # "pending" etc.
 ]
 
+# 0-based positions within a row of REMINDER_HEADERS, computed once
+ID_IDX = REMINDER_HEADERS.index("reminder_id")
+DUE_AT_IDX = REMINDER_HEADERS.index("due_at")
+STATUS_IDX = REMINDER_HEADERS.index("status")
+
+# 1-based sheet column numbers for the same fields (python counts from 0, google sheets from 1)
+COL_REMINDER_ID = ID_IDX + 1
+COL_DUE_AT = DUE_AT_IDX + 1
+COL_STATUS = STATUS_IDX + 1
+
+# How long get_all_reminders() may serve its in-memory copy before re-reading the sheet.
+# Our own writes invalidate it immediately; this only bounds staleness from hand edits.
+REMINDER_CACHE_TTL_SECONDS = 30
+
+# Retries for Sheets calls that hit 429 (per-minute quota) or a 5xx
+SHEETS_MAX_ATTEMPTS = 6
+SHEETS_MAX_BACKOFF_SECONDS = 32
+
 CONFIG_SHEET_NAME = "Config"
 CONFIG_HEADERS = ["key", "value"]
 
+T = TypeVar("T")
+
+
+def _with_retry(fn: Callable[..., T], *args: Any, idempotent: bool = True, **kwargs: Any) -> T:
+    """
+    Call a gspread method, retrying on rate limiting (429) and server errors (5xx).
+
+    Waits for Retry-After if the response has one, otherwise 1s, 2s, 4s, ... (capped at 32s)
+    plus jitter, for up to SHEETS_MAX_ATTEMPTS attempts; the last error is re-raised.
+
+    Set idempotent=False for appends / row deletes: a 5xx may still have been applied, and
+    repeating it would append a duplicate row or delete the wrong one. Those only retry 429s,
+    which Sheets rejects before doing anything.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status = e.response.status_code
+            retryable = status == 429 or (idempotent and status >= 500)
+            attempt += 1
+            if not retryable or attempt >= SHEETS_MAX_ATTEMPTS:
+                raise
+
+            retry_after = e.response.headers.get("Retry-After")
+            try:
+                delay = float(retry_after) if retry_after else None
+            except ValueError:
+                delay = None
+            if delay is None:
+                delay = min(2 ** (attempt - 1), SHEETS_MAX_BACKOFF_SECONDS) + random.uniform(0, 1)
+
+            logger.warning(
+                "Sheets API error %s in %s; retrying in %.1fs (attempt %d/%d)",
+                status,
+                getattr(fn, "__name__", fn),
+                delay,
+                attempt,
+                SHEETS_MAX_ATTEMPTS,
+            )
+            time.sleep(delay)
+
+
+def _first_cell(value_range: Dict[str, Any]) -> str:
+    """Top-left cell of a values API ValueRange, stripped ("" when the range is empty)."""
+    values = value_range.get("values") or [[]]
+    return str(values[0][0]).strip() if values[0] else ""
+
+
 @dataclass
 class Reminder:
     reminder_id: str
@@ -69,16 +141,30 @@ class ReminderSheetRepository:
         spreadsheet = client.open_by_key(spreadsheet_id)
 
         try:
-            worksheet = spreadsheet.worksheet(worksheet_name)
+            worksheet = _with_retry(spreadsheet.worksheet, worksheet_name)
         except gspread.WorksheetNotFound:
             logger.info("Worksheet '%s' not found, creating it.", worksheet_name)
-            worksheet = spreadsheet.add_worksheet(title=worksheet_name, rows=1000, cols=20)
+            worksheet = _with_retry(
+                spreadsheet.add_worksheet,
+                title=worksheet_name,
+                rows=1000,
+                cols=20,
+                idempotent=False,
+            )
 
         # Keep references so we can access other worksheets (e.g. Config)
         self.client = client
         self.spreadsheet = spreadsheet
         self.worksheet = worksheet
 
+        # In-memory copy of the Reminders sheet (see get_all_reminders) + reminder_id index
+        self._cache: Optional[List[Reminder]] = None
+        self._id_index: Dict[str, Reminder] = {}
+        self._cache_loaded_at = 0.0
+        # Bumped on every invalidation, so a read that raced a write doesn't store stale rows
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
+
         # Ensure header row is present and correct
         self._ensure_header()
 
@@ -89,17 +175,18 @@ class ReminderSheetRepository:
         If the sheet is empty, write the header.
         If the first row differs, overwrite it (we don't care about old test data).
         """
-        values = self.worksheet.get_all_values()
-        if not values:
-            logger.info("Worksheet is empty, writing header row.")
-            self.worksheet.append_row(REMINDER_HEADERS)
+        # Only row 1 matters here; get_all_values() would download the whole sheet
+        first_row = _with_retry(self.worksheet.row_values, 1)
+        if first_row == REMINDER_HEADERS:
             return
 
-        first_row = values[0]
-        if first_row != REMINDER_HEADERS:
+        if not first_row:
+            logger.info("Header row is empty, writing header row.")
+        else:
             logger.warning("First row does not match expected headers, overwriting it.")
-            # Overwrite row 1 with our headers
-            self.worksheet.update(range_name="1:1", values=[REMINDER_HEADERS])
+        # Write row 1 in place: an empty row 1 can still have data below it, and append_row
+        # would then put the header after that data
+        _with_retry(self.worksheet.update, range_name="1:1", values=[REMINDER_HEADERS])
 
     # --------- TEST METHODS (still useful) --------- #
 
@@ -110,19 +197,17 @@ class ReminderSheetRepository:
         """
         now = datetime.now(UTC).isoformat()
         # We'll just append in the first two columns after the header.
-        self.worksheet.append_row([now, note])
+        _with_retry(self.worksheet.append_row, [now, note], idempotent=False)
 
     def get_all_values(self) -> List[List[Any]]:
         """Return all values in the worksheet as a 2D list."""
-        return self.worksheet.get_all_values()
+        return _with_retry(self.worksheet.get_all_values)
 
     # --------- REMINDER CRUD API --------- #
 
-    def create_reminder(self, reminder: Reminder) -> None:
-        """
-        Append a new reminder row to the sheet.
-        """
-        row = [
+    def _reminder_to_row(self, reminder: Reminder) -> List[str]:
+        """Convert a Reminder into a sheet row, in REMINDER_HEADERS order."""
+        return [
             reminder.reminder_id,
             reminder.source_type,
             reminder.gmail_message_id or "",
@@ -134,7 +219,13 @@ class ReminderSheetRepository:
             reminder.due_at.isoformat(),
             reminder.status,
         ]
-        self.worksheet.append_row(row)
+
+    def create_reminder(self, reminder: Reminder) -> None:
+        """
+        Append a new reminder row to the sheet.
+        """
+        _with_retry(self.worksheet.append_row, self._reminder_to_row(reminder), idempotent=False)
+        self.invalidate_cache()
 
     def _row_to_reminder(self, row_dict: dict, row_number: int) -> Optional[Reminder]:
         """
@@ -191,11 +282,40 @@ class ReminderSheetRepository:
         """
         Return all reminders as Reminder objects.
 
+        Served from memory when the sheet was read less than REMINDER_CACHE_TTL_SECONDS ago
+        and none of our write methods ran since; otherwise re-read via _load_reminders().
+        """
+        with self._cache_lock:
+            if (
+                self._cache is not None
+                and time.monotonic() - self._cache_loaded_at < REMINDER_CACHE_TTL_SECONDS
+            ):
+                return list(self._cache)
+            generation = self._cache_generation
+
+        reminders = self._load_reminders()
+
+        id_index: Dict[str, Reminder] = {}
+        for r in reminders:
+            # Same as the old linear scans: the first row with a given id wins
+            id_index.setdefault(r.reminder_id, r)
+
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                self._cache = reminders
+                self._id_index = id_index
+                self._cache_loaded_at = time.monotonic()
+        return list(reminders)
+
+    def _load_reminders(self) -> List[Reminder]:
+        """
+        Read every reminder from the sheet.
+
         Uses get_all_records(), which returns:
           - A list of dicts, one per row after the header.
         Row number is 2 + index (since header is row 1).
         """
-        records = self.worksheet.get_all_records()
+        records = _with_retry(self.worksheet.get_all_records)
         reminders: List[Reminder] = []
         for idx, row_dict in enumerate(records):
             row_number = idx + 2  # header is row 1
@@ -204,6 +324,62 @@ class ReminderSheetRepository:
                 reminders.append(reminder)
         return reminders
 
+    def _find_reminder(self, reminder_id: str) -> Optional[Reminder]:
+        """Look up one reminder (with its row_number) by id, via the cached index."""
+        reminders = self.get_all_reminders()
+        with self._cache_lock:
+            if self._cache is not None:
+                return self._id_index.get(reminder_id)
+        # Cache was invalidated while we were loading; fall back to the list we got
+        return next((r for r in reminders if r.reminder_id == reminder_id), None)
+
+    def _find_reminder_for_write(self, reminder_id: str) -> Optional[Reminder]:
+        """
+        Like _find_reminder(), but confirm the row still holds reminder_id before we write to it.
+
+        The cached index can be up to REMINDER_CACHE_TTL_SECONDS old, and rows deleted or sorted
+        by hand in that window move. If the sheet was read during this lookup, its row numbers
+        are trusted as-is. Otherwise one single-cell read of column A checks the cached row; if it
+        no longer matches (or the id isn't cached), drop the cache and look it up from a fresh read.
+        """
+        lookup_started = time.monotonic()
+        r = self._find_reminder(reminder_id)
+        if self._cache_loaded_since(lookup_started):
+            return r
+
+        if r is not None and r.row_number is not None:
+            if self._row_holds_reminder(r.row_number, reminder_id):
+                return r
+            logger.info(
+                "Row %s no longer holds reminder %s; re-reading sheet",
+                r.row_number,
+                reminder_id,
+            )
+
+        self.invalidate_cache()
+        return self._find_reminder(reminder_id)
+
+    def _cache_loaded_since(self, started: float) -> bool:
+        """True if the cached reminders were read from the sheet at or after `started`."""
+        with self._cache_lock:
+            return self._cache is not None and self._cache_loaded_at >= started
+
+    def _row_holds_reminder(self, row_number: int, reminder_id: str) -> bool:
+        """True if the reminder_id cell on row_number is reminder_id."""
+        resp = _with_retry(self.spreadsheet.values_get, self._reminder_id_cell(row_number))
+        return _first_cell(resp) == reminder_id
+
+    def _reminder_id_cell(self, row_number: int) -> str:
+        """Absolute A1 range of the reminder_id cell on row_number, e.g. 'Reminders'!A5."""
+        return absolute_range_name(self.worksheet_name, rowcol_to_a1(row_number, COL_REMINDER_ID))
+
+    def invalidate_cache(self) -> None:
+        """Drop the in-memory reminders so the next read goes to the sheet."""
+        with self._cache_lock:
+            self._cache = None
+            self._id_index = {}
+            self._cache_generation += 1
+
     def get_due_reminders(self, now: datetime) -> List[Reminder]:
         """
         Return all reminders where:
@@ -217,56 +393,201 @@ class ReminderSheetRepository:
                 due.append(r)
         return due
 
+    def get_due_reminders_fast(self, now: datetime) -> List[Reminder]:
+        """
+        Same result as get_due_reminders(now), always read fresh from the sheet.
+
+        One values_get for the data rows (A2 onwards), then a plain list scan: rows are only
+        turned into Reminder objects once their status is "pending", instead of building a
+        dict per row like get_all_records() does.
+        """
+        last_col = rowcol_to_a1(1, len(REMINDER_HEADERS)).rstrip("0123456789")
+        resp = _with_retry(
+            self.spreadsheet.values_get,
+            absolute_range_name(self.worksheet_name, f"A2:{last_col}"),
+        )
+        width = len(REMINDER_HEADERS)
+
+        due: List[Reminder] = []
+        for idx, row in enumerate(resp.get("values", [])):
+            if len(row) <= STATUS_IDX or row[STATUS_IDX] != "pending":
+                continue
+            if len(row) < width:
+                # The API drops trailing empty cells
+                row = row + [""] * (width - len(row))
+            reminder = self._row_to_reminder(dict(zip(REMINDER_HEADERS, row)), idx + 2)
+            if reminder is not None and reminder.due_at <= now:
+                due.append(reminder)
+        return due
+
     def update_reminder_due_at(self, reminder_id: str, new_due_at: datetime) -> bool:
         """
         Set due_at = new_due_at and status = "pending" for the row matching reminder_id.
         Returns True if updated, False if not found.
         """
-        reminders = self.get_all_reminders()
-        for r in reminders:
-            if r.reminder_id == reminder_id and r.row_number is not None:
-                # Update due_at
-                self.worksheet.update_cell(
-                    r.row_number,
-                    REMINDER_HEADERS.index("due_at") + 1,
-                    new_due_at.isoformat(),
-                )
-                # Reset status so it will be picked up again at the new due_at
-                self.worksheet.update_cell(
-                    r.row_number,
-                    REMINDER_HEADERS.index("status") + 1,
-                    "pending",
-                )
-                return True
-        return False
+        r = self._find_reminder_for_write(reminder_id)
+        if r is None or r.row_number is None:
+            return False
+
+        # One API call for both cells: the new due_at, and status reset to "pending"
+        # so it will be picked up again at the new due_at
+        self._write_cells(
+            [
+                (r.row_number, COL_DUE_AT, new_due_at.isoformat()),
+                (r.row_number, COL_STATUS, "pending"),
+            ],
+            value_input_option="USER_ENTERED",  # same as the update_cell calls this replaced
+        )
+        self.invalidate_cache()
+        return True
 
     def delete_reminder(self, reminder_id: str) -> bool:
         """
         Delete the row matching reminder_id.
         Returns True if a row was deleted, False if not found.
         """
-        reminders = self.get_all_reminders()
-        for r in reminders:
-            if r.reminder_id == reminder_id and r.row_number is not None:
-                self.worksheet.delete_rows(r.row_number)
-                return True
-        return False
+        # Row deletes can't be undone, so never trust a cached row number without checking it
+        r = self._find_reminder_for_write(reminder_id)
+        if r is None or r.row_number is None:
+            return False
+
+        deleted_row = r.row_number
+        # Same deleteDimension request worksheet.delete_rows() sends, issued directly
+        _with_retry(
+            self.spreadsheet.batch_update,
+            {
+                "requests": [
+                    {
+                        "deleteDimension": {
+                            "range": {
+                                "sheetId": self.worksheet.id,
+                                "dimension": "ROWS",
+                                "startIndex": deleted_row - 1,
+                                "endIndex": deleted_row,
+                            }
+                        }
+                    }
+                ]
+            },
+            idempotent=False,
+        )
+        self._patch_cache_after_delete(reminder_id, deleted_row)
+        return True
+
+    def _write_cells(self, cells: List[Tuple[int, int, Any]], value_input_option: str) -> None:
+        """
+        Write (row, col, value) cells of the Reminders sheet in one values:batchUpdate call.
+
+        The request body is built once with absolute ranges and never modified, so _with_retry
+        can resend it as-is. (worksheet.batch_update() rewrites the ranges of the list it is
+        given in place, which turned a retried write into "'Reminders'!'Reminders'!I5".)
+        """
+        body = {
+            "valueInputOption": value_input_option,
+            "data": [
+                {
+                    "range": absolute_range_name(self.worksheet_name, rowcol_to_a1(row, col)),
+                    "values": [[value]],
+                }
+                for row, col, value in cells
+            ],
+        }
+        _with_retry(self.spreadsheet.values_batch_update, body)
+
+    def _patch_cache_after_delete(self, reminder_id: str, deleted_row: int) -> None:
+        """
+        Drop the deleted reminder from the cache and shift up every row below it, instead of
+        re-reading the whole sheet on the next lookup.
+        """
+        with self._cache_lock:
+            # Any load that started before the delete has stale row numbers; don't let it land
+            self._cache_generation += 1
+            if self._cache is None or reminder_id not in self._id_index:
+                self._cache = None
+                self._id_index = {}
+                return
+
+            # Reminder objects are handed out to callers, so shifted rows get fresh copies
+            reminders: List[Reminder] = []
+            for cached in self._cache:
+                if cached.row_number == deleted_row:
+                    continue
+                if cached.row_number is not None and cached.row_number > deleted_row:
+                    cached = replace(cached, row_number=cached.row_number - 1)
+                reminders.append(cached)
+
+            id_index: Dict[str, Reminder] = {}
+            for cached in reminders:
+                id_index.setdefault(cached.reminder_id, cached)
+            self._cache = reminders
+            self._id_index = id_index
 
     def update_reminder_status(self, reminder_id: str, new_status: str) -> bool:
         """
         Set status = new_status for the row matching reminder_id.
         Returns True if updated, False if not found.
         """
-        reminders = self.get_all_reminders()
-        for r in reminders:
-            if r.reminder_id == reminder_id and r.row_number is not None:
-                self.worksheet.update_cell(
-                    r.row_number,
-                    REMINDER_HEADERS.index("status") + 1, # python counts from 0, but google sheets count from 1, so need to +1 to offset this
-                    new_status,
+        r = self._find_reminder_for_write(reminder_id)
+        if r is None or r.row_number is None:
+            return False
+
+        _with_retry(
+            self.worksheet.update_cell,
+            r.row_number,
+            COL_STATUS,
+            new_status,
+        )
+        self.invalidate_cache()
+        return True
+
+    def batch_update_reminder_statuses(self, updates: List[Tuple[Reminder, str]]) -> List[str]:
+        """
+        Set status for several reminders in a single Sheets API call.
+
+        updates: list of (reminder, new_status) pairs, e.g. from get_due_reminders_fast. Their
+        row numbers may be out of date by the time we write (a Complete press deleting a row on
+        another thread, a hand sort), so all of them are checked with one values:batchGet of
+        column A; reminders whose row moved (or that have no row_number) are looked up by id.
+        Returns the reminder_ids that were not found (nothing is written for those).
+        """
+        if not updates:
+            return []
+
+        # Index into updates -> whether its row still holds its reminder_id
+        checked = [i for i, (r, _) in enumerate(updates) if r.row_number is not None]
+        row_matches: Dict[int, bool] = {}
+        if checked:
+            resp = _with_retry(
+                self.spreadsheet.values_batch_get,
+                [self._reminder_id_cell(updates[i][0].row_number) for i in checked],
+            )
+            # One valueRange per requested range, in request order
+            for i, value_range in zip(checked, resp.get("valueRanges", [])):
+                row_matches[i] = _first_cell(value_range) == updates[i][0].reminder_id
+
+        data = []
+        missing: List[str] = []
+        for i, (reminder, new_status) in enumerate(updates):
+            row_number = reminder.row_number
+            if row_number is not None and not row_matches.get(i, False):
+                logger.info(
+                    "Row %s no longer holds reminder %s; looking it up again",
+                    row_number,
+                    reminder.reminder_id,
                 )
-                return True
-        return False
+                row_number = None
+            if row_number is None:
+                found = self._find_reminder_for_write(reminder.reminder_id)
+                row_number = found.row_number if found is not None else None
+            if row_number is None:
+                missing.append(reminder.reminder_id)
+                continue
+            data.append((row_number, COL_STATUS, new_status))
+
+        if data:
+            self._write_cells(data, value_input_option="RAW")
+            self.invalidate_cache()
+        return missing
 
     # --------- CONFIG SHEET API (for things like last_history_id) --------- #
 
@@ -276,25 +597,31 @@ class ReminderSheetRepository:
         Return the gspread worksheet object.
         """
         try:
-            ws = self.spreadsheet.worksheet(CONFIG_SHEET_NAME)
+            ws = _with_retry(self.spreadsheet.worksheet, CONFIG_SHEET_NAME)
         except gspread.WorksheetNotFound:
             logger.info("Config worksheet '%s' not found, creating it.", CONFIG_SHEET_NAME)
-            ws = self.spreadsheet.add_worksheet(title=CONFIG_SHEET_NAME, rows=50, cols=2)
-            ws.update(range_name="A1:B1", values=[CONFIG_HEADERS])
+            ws = _with_retry(
+                self.spreadsheet.add_worksheet,
+                title=CONFIG_SHEET_NAME,
+                rows=50,
+                cols=2,
+                idempotent=False,
+            )
+            _with_retry(ws.update, range_name="A1:B1", values=[CONFIG_HEADERS])
             return ws
 
         # Ensure header row is present and correct
-        values = ws.get_all_values()
+        values = _with_retry(ws.get_all_values)
         if not values:
             logger.info("Config worksheet is empty, writing header row.")
-            ws.update(range_name="A1:B1", values=[CONFIG_HEADERS])
+            _with_retry(ws.update, range_name="A1:B1", values=[CONFIG_HEADERS])
         else:
             first_row = values[0]
             if first_row != CONFIG_HEADERS:
                 logger.warning(
                     "Config first row does not match expected headers, overwriting it."
                 )
-                ws.update(range_name="1:1", values=[CONFIG_HEADERS])
+                _with_retry(ws.update, range_name="1:1", values=[CONFIG_HEADERS])
 
         return ws
 
@@ -308,7 +635,7 @@ class ReminderSheetRepository:
         """
         try:
             ws = self._get_or_create_config_worksheet()
-            values = ws.get_all_values()
+            values = _with_retry(ws.get_all_values)
         except Exception:
             logger.exception("Unable to read config key=%r from Config sheet.", key)
             return None
@@ -332,7 +659,7 @@ class ReminderSheetRepository:
         """
         try:
             ws = self._get_or_create_config_worksheet()
-            values = ws.get_all_values()
+            values = _with_retry(ws.get_all_values)
         except Exception:
             logger.exception("Unable to write config key=%r to Config sheet.", key)
             return
@@ -340,10 +667,10 @@ class ReminderSheetRepository:
         # Look for existing row with same key
         for idx, row in enumerate(values[1:], start=2):  # row index from 2 (after header)
             if row and row[0] == key:
-                ws.update(range_name=f"B{idx}", values=[[value]]) # the values to be written in the cell must be stored in a list! or you can use the method below
+                _with_retry(ws.update, range_name=f"B{idx}", values=[[value]]) # the values to be written in the cell must be stored in a list! or you can use the method below
                 # OPTION 2: use update_cell (simplest)
                 # ws.update_cell(idx, 2, value) -> row, column, value
                 return
 
         # Not found: append a new row
-        ws.append_row([key, value])
\ No newline at end of file
+        _with_retry(ws.append_row, [key, value], idempotent=False)
\ No newline at end of file
@@ -1,12 +1,28 @@
 import logging
-from typing import Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
 
 import telebot
+from cachetools import TTLCache
 from telebot import types
+from telebot.apihelper import ApiTelegramException
 
 
 logger = logging.getLogger(__name__)
 
+# Threads for send_messages(). Long-lived, so telebot's per-thread requests.Session keeps its
+# connection warm between bursts.
+TELEGRAM_SEND_WORKERS = 8
+
+# Telegram allows roughly 30 messages per second per bot; space out bursts to stay under it
+TELEGRAM_MIN_SEND_INTERVAL_SECONDS = 1 / 30
+
+# Update payloads we accept, checked in this order; the first one present decides.
+_UPDATE_USER_KEYS = ("message", "callback_query")
+
 
 class TelegramBot:
     """
@@ -14,6 +30,7 @@ class TelegramBot:
 
     Exposed interface:
       - send_message(chat_id, text, reply_markup=None)
+      - send_messages([(chat_id, text, reply_markup), ...])
       - is_allowed_user(update_dict)
       - build_manual_offset_keyboard()
       - answer_callback_query(callback_query_id, text=None, show_alert=False)
@@ -24,6 +41,22 @@ class TelegramBot:
         # We won't use telebot's polling or decorator system; just its client.
         self.bot = telebot.TeleBot(token, parse_mode=None)
 
+        # (chat_id, message_id) -> hash of the text we last set with the keyboard removed.
+        # A double tap / Telegram retry produces the exact same final edit; skipping it saves a
+        # round-trip and a guaranteed 400 "message is not modified".
+        self._applied_edits: TTLCache = TTLCache(maxsize=1024, ttl=600)
+        self._applied_edits_lock = threading.Lock()  # TTLCache is not thread-safe
+
+        self._send_executor = ThreadPoolExecutor(
+            max_workers=TELEGRAM_SEND_WORKERS,
+            thread_name_prefix="telegram-send",
+        )
+        self._send_throttle_lock = threading.Lock()
+        self._next_send_at = 0.0
+
+        # The manual keyboard never changes, so build it once; telebot only reads it when serialising
+        self._manual_offset_markup = _build_manual_offset_markup()
+
     def send_message(
         self,
         chat_id: int,
@@ -48,10 +81,54 @@ class TelegramBot:
             logger.exception("Error sending Telegram message")
             raise
 
+    def send_messages(self, messages: List[Tuple[int, str, Any]]) -> List[Optional[Any]]:
+        """
+        Send several messages concurrently and wait for all of them.
+
+        messages is a list of (chat_id, text, reply_markup). Returns one entry per message, in
+        the same order: the telebot Message, or None if that send failed (already logged by
+        send_message). Submissions are spaced TELEGRAM_MIN_SEND_INTERVAL_SECONDS apart.
+        """
+        futures = []
+        for chat_id, text, reply_markup in messages:
+            self._wait_for_send_slot()
+            futures.append(self._send_executor.submit(self.send_message, chat_id, text, reply_markup))
+
+        results: List[Optional[Any]] = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception:
+                results.append(None)
+        return results
+
+    def _wait_for_send_slot(self) -> None:
+        """Block until the next send is allowed under the global rate limit."""
+        with self._send_throttle_lock:
+            now = time.monotonic()
+            wait = self._next_send_at - now
+            self._next_send_at = max(now, self._next_send_at) + TELEGRAM_MIN_SEND_INTERVAL_SECONDS
+        if wait > 0:
+            time.sleep(wait)
+
     def edit_message_text(self,chat_id: int,message_id: int,text: str,reply_markup: Any | None = None,) -> None:
         """
         Edit an existing Telegram message (and optionally replace/remove its keyboard).
+
+        Repeating an edit that already removed the keyboard with the same text is a no-op.
         """
+        edit_key = (chat_id, message_id)
+        text_hash = hash(text)
+        if reply_markup is None:
+            with self._applied_edits_lock:
+                if self._applied_edits.get(edit_key) == text_hash:
+                    logger.info(
+                        "Skipping duplicate edit for chat_id=%s message_id=%s",
+                        chat_id,
+                        message_id,
+                    )
+                    return
+
         try:
             self.bot.edit_message_text(
                 chat_id=chat_id,
@@ -59,12 +136,30 @@ class TelegramBot:
                 text=text,
                 reply_markup=reply_markup,
             )
+        except ApiTelegramException as e:
+            if "message is not modified" in (e.description or "").lower():
+                # Same text + markup as what's already shown; nothing to do
+                return
+            logger.exception(
+                "Error editing Telegram message chat_id=%s message_id=%s",
+                chat_id,
+                message_id,
+            )
+            return
         except Exception:
             logger.exception(
                 "Error editing Telegram message chat_id=%s message_id=%s",
                 chat_id,
                 message_id,
             )
+            return
+
+        with self._applied_edits_lock:
+            if reply_markup is None:
+                self._applied_edits[edit_key] = text_hash
+            else:
+                # A new keyboard was attached, so later edits of this message are real changes
+                self._applied_edits.pop(edit_key, None)
 
     def is_allowed_user(self, update: Dict[str, Any]) -> bool:
         """
@@ -74,15 +169,11 @@ class TelegramBot:
         if self.allowed_user_id is None:
             return True
 
-        # Normal message
-        if "message" in update:
-            from_user = (update["message"].get("from") or {})
-            return from_user.get("id") == self.allowed_user_id
-
-        # Callback query
-        if "callback_query" in update:
-            from_user = (update["callback_query"].get("from") or {})
-            return from_user.get("id") == self.allowed_user_id
+        for key in _UPDATE_USER_KEYS:
+            payload = update.get(key)
+            if payload is not None:
+                from_user = payload.get("from") or {}
+                return from_user.get("id") == self.allowed_user_id
 
         # Other update types we don't recognise yet
         return False
@@ -93,18 +184,7 @@ class TelegramBot:
         """ Inline keyboard with +1h / +1d / +3d / +1w / Custom for manual reminders.
         callback_data uses 'manual_offset:' format.
         """
-        markup = types.InlineKeyboardMarkup()
-        buttons = [
-            types.InlineKeyboardButton("+1 hour", callback_data="manual_offset:1h"),
-            types.InlineKeyboardButton("+1 day", callback_data="manual_offset:1d"),
-            types.InlineKeyboardButton("+3 days", callback_data="manual_offset:3d"),
-            types.InlineKeyboardButton("+1 week", callback_data="manual_offset:1w"),
-            types.InlineKeyboardButton("Custom", callback_data="manual_offset:custom"),
-        ]
-        markup.row(buttons[0], buttons[1])
-        markup.row(buttons[2], buttons[3])
-        markup.row(buttons[4])
-        return markup
+        return self._manual_offset_markup
 
     def answer_callback_query(
         self,
@@ -137,51 +217,14 @@ class TelegramBot:
           - email_action:set:<gmail_message_id>
           - email_action:done:<gmail_message_id>
         """
-        markup = types.InlineKeyboardMarkup()
-        btn_set = types.InlineKeyboardButton(
-            "Set reminder",
-            callback_data=f"email_action:set:{gmail_message_id}",
-        )
-        btn_done = types.InlineKeyboardButton(
-            "Done",
-            callback_data=f"email_action:done:{gmail_message_id}",
-        )
-        markup.row(btn_set, btn_done)
-        return markup
+        return _build_email_action_markup(gmail_message_id)
 
     def build_email_offset_keyboard(self, gmail_message_id: str) -> types.InlineKeyboardMarkup:
         """
         Inline keyboard with +1h / +1d / +3d / +1w / Custom for email-based reminders.
         callback_data format: email_offset:<gmail_message_id>:<key> -> the key can be either 1h,1d,3d,1w, or custom
         """
-        markup = types.InlineKeyboardMarkup()
-        buttons = [
-            types.InlineKeyboardButton(
-                "+1 hour",
-                callback_data=f"email_offset:{gmail_message_id}:1h",
-            ),
-            types.InlineKeyboardButton(
-                "+1 day",
-                callback_data=f"email_offset:{gmail_message_id}:1d",
-            ),
-            types.InlineKeyboardButton(
-                "+3 days",
-                callback_data=f"email_offset:{gmail_message_id}:3d",
-            ),
-            types.InlineKeyboardButton(
-                "+1 week",
-                callback_data=f"email_offset:{gmail_message_id}:1w",
-            ),
-            types.InlineKeyboardButton(
-                "Custom",
-                callback_data=f"email_offset:{gmail_message_id}:custom",
-            ),
-        ]
-        # Layout: two rows of presets + one row for Custom
-        markup.row(buttons[0], buttons[1])
-        markup.row(buttons[2], buttons[3])
-        markup.row(buttons[4])
-        return markup
+        return _build_email_offset_markup(gmail_message_id)
 
     def build_reminder_control_keyboard(self, reminder_id: str) -> types.InlineKeyboardMarkup:
         """
@@ -191,42 +234,7 @@ class TelegramBot:
         Snooze buttons use: reminder_extend:<reminder_id>:<key>
         Complete uses:       reminder_complete:<reminder_id>
         """
-        markup = types.InlineKeyboardMarkup()
-
-        snooze_buttons = [
-            types.InlineKeyboardButton(
-                "+1 hour",
-                callback_data=f"reminder_extend:{reminder_id}:1h",
-            ),
-            types.InlineKeyboardButton(
-                "+1 day",
-                callback_data=f"reminder_extend:{reminder_id}:1d",
-            ),
-            types.InlineKeyboardButton(
-                "+3 days",
-                callback_data=f"reminder_extend:{reminder_id}:3d",
-            ),
-            types.InlineKeyboardButton(
-                "+1 week",
-                callback_data=f"reminder_extend:{reminder_id}:1w",
-            ),
-            types.InlineKeyboardButton(
-                "Custom",
-                callback_data=f"reminder_extend:{reminder_id}:custom",
-            ),
-        ]
-        complete_button = types.InlineKeyboardButton(
-            "Complete",
-            callback_data=f"reminder_complete:{reminder_id}",
-        )
-
-        # Layout: 2 rows presets, 1 row Custom, 1 row Complete
-        markup.row(snooze_buttons[0], snooze_buttons[1])
-        markup.row(snooze_buttons[2], snooze_buttons[3])
-        markup.row(snooze_buttons[4])
-        markup.row(complete_button)
-
-        return markup
+        return _build_reminder_control_markup(reminder_id)
 
     def build_custom_datetime_cancel_keyboard(self, mode: str) -> types.InlineKeyboardMarkup:
         """
@@ -239,4 +247,127 @@ class TelegramBot:
             callback_data=f"custom_cancel:{mode}",
         )
         markup.add(button)
-        return markup
\ No newline at end of file
+        return markup
+
+
+# --------- Keyboard builders --------- #
+# Markups are only read when telebot serialises them, so the same object can be reused across
+# sends. The ID-keyed builders live at module level so lru_cache keys on the id, not on self.
+
+
+class _PreserializedInlineKeyboardMarkup(types.InlineKeyboardMarkup):
+    """
+    InlineKeyboardMarkup that serialises itself once.
+
+    telebot calls to_json() on every send; for the cached keyboards below the result never
+    changes, so keep the string. Only use it for markups that are fully built before the first send.
+    """
+
+    _json: Optional[str] = None
+
+    def to_json(self) -> str:
+        if self._json is None:
+            self._json = super().to_json()
+        return self._json
+
+
+def _build_manual_offset_markup() -> types.InlineKeyboardMarkup:
+    markup = _PreserializedInlineKeyboardMarkup()
+    buttons = [
+        types.InlineKeyboardButton("+1 hour", callback_data="manual_offset:1h"),
+        types.InlineKeyboardButton("+1 day", callback_data="manual_offset:1d"),
+        types.InlineKeyboardButton("+3 days", callback_data="manual_offset:3d"),
+        types.InlineKeyboardButton("+1 week", callback_data="manual_offset:1w"),
+        types.InlineKeyboardButton("Custom", callback_data="manual_offset:custom"),
+    ]
+    markup.row(buttons[0], buttons[1])
+    markup.row(buttons[2], buttons[3])
+    markup.row(buttons[4])
+    return markup
+
+
+@lru_cache(maxsize=256)
+def _build_email_action_markup(gmail_message_id: str) -> types.InlineKeyboardMarkup:
+    markup = _PreserializedInlineKeyboardMarkup()
+    btn_set = types.InlineKeyboardButton(
+        "Set reminder",
+        callback_data=f"email_action:set:{gmail_message_id}",
+    )
+    btn_done = types.InlineKeyboardButton(
+        "Done",
+        callback_data=f"email_action:done:{gmail_message_id}",
+    )
+    markup.row(btn_set, btn_done)
+    return markup
+
+
+@lru_cache(maxsize=256)
+def _build_email_offset_markup(gmail_message_id: str) -> types.InlineKeyboardMarkup:
+    markup = _PreserializedInlineKeyboardMarkup()
+    buttons = [
+        types.InlineKeyboardButton(
+            "+1 hour",
+            callback_data=f"email_offset:{gmail_message_id}:1h",
+        ),
+        types.InlineKeyboardButton(
+            "+1 day",
+            callback_data=f"email_offset:{gmail_message_id}:1d",
+        ),
+        types.InlineKeyboardButton(
+            "+3 days",
+            callback_data=f"email_offset:{gmail_message_id}:3d",
+        ),
+        types.InlineKeyboardButton(
+            "+1 week",
+            callback_data=f"email_offset:{gmail_message_id}:1w",
+        ),
+        types.InlineKeyboardButton(
+            "Custom",
+            callback_data=f"email_offset:{gmail_message_id}:custom",
+        ),
+    ]
+    # Layout: two rows of presets + one row for Custom
+    markup.row(buttons[0], buttons[1])
+    markup.row(buttons[2], buttons[3])
+    markup.row(buttons[4])
+    return markup
+
+
+@lru_cache(maxsize=256)
+def _build_reminder_control_markup(reminder_id: str) -> types.InlineKeyboardMarkup:
+    markup = _PreserializedInlineKeyboardMarkup()
+
+    snooze_buttons = [
+        types.InlineKeyboardButton(
+            "+1 hour",
+            callback_data=f"reminder_extend:{reminder_id}:1h",
+        ),
+        types.InlineKeyboardButton(
+            "+1 day",
+            callback_data=f"reminder_extend:{reminder_id}:1d",
+        ),
+        types.InlineKeyboardButton(
+            "+3 days",
+            callback_data=f"reminder_extend:{reminder_id}:3d",
+        ),
+        types.InlineKeyboardButton(
+            "+1 week",
+            callback_data=f"reminder_extend:{reminder_id}:1w",
+        ),
+        types.InlineKeyboardButton(
+            "Custom",
+            callback_data=f"reminder_extend:{reminder_id}:custom",
+        ),
+    ]
+    complete_button = types.InlineKeyboardButton(
+        "Complete",
+        callback_data=f"reminder_complete:{reminder_id}",
+    )
+
+    # Layout: 2 rows presets, 1 row Custom, 1 row Complete
+    markup.row(snooze_buttons[0], snooze_buttons[1])
+    markup.row(snooze_buttons[2], snooze_buttons[3])
+    markup.row(snooze_buttons[4])
+    markup.row(complete_button)
+
+    return markup
@@ -0,0 +1,16 @@
+import os
+
+# app.py builds module_level_app on import, and config.py loads .env. Pin the environment before
+# any test imports them: no Telegram / Google credentials (load_dotenv never overrides a variable
+# that is already set, even to ""), and a fixed allowlist and user.
+for _name in (
+    "TELEGRAM_BOT_TOKEN",
+    "GOOGLE_SHEETS_SPREADSHEET_ID",
+    "GOOGLE_SERVICE_ACCOUNT_JSON",
+    "GMAIL_OAUTH_TOKEN_JSON",
+    "PUBSUB_PUSH_AUDIENCE",
+    "PUBSUB_PUSH_SERVICE_ACCOUNT",
+):
+    os.environ[_name] = ""
+os.environ["ALLOWED_SENDER_EMAILS"] = "boss@example.com"
+os.environ["TELEGRAM_USER_ID"] = "42"
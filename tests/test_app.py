@@ -0,0 +1,441 @@
+import base64
+import io
+import json
+import threading
+import time
+from datetime import datetime, UTC
+from unittest import mock
+
+import google.auth.crypt
+import google.auth.jwt
+import pytest
+import rsa
+
+import app as app_module
+from sheets_repo import Reminder, ReminderSheetRepository
+from telegram_bot import TelegramBot
+
+
+def make_reminder(reminder_id: str, chat_id: int = 42) -> Reminder:
+    return Reminder(
+        reminder_id=reminder_id,
+        source_type="manual",
+        gmail_message_id=None,
+        subject=None,
+        sender=None,
+        recipient=None,
+        description=f"desc {reminder_id}",
+        telegram_chat_id=chat_id,
+        due_at=datetime(2030, 1, 1, tzinfo=UTC),
+        status="pending",
+        row_number=None,
+    )
+
+
+def message_update(text: str) -> dict:
+    return {"message": {"chat": {"id": 42}, "from": {"id": 42}, "text": text}}
+
+
+def callback_update(data: str, callback_query_id: str = "cq1") -> dict:
+    return {
+        "callback_query": {
+            "id": callback_query_id,
+            "from": {"id": 42},
+            "data": data,
+            "message": {"message_id": 10, "chat": {"id": 42}},
+        }
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_chat_state():
+    """The /new and custom datetime flows keep per-chat state at module level."""
+    app_module.manual_new_state.clear()
+    app_module.custom_datetime_state.clear()
+    yield
+    app_module.manual_new_state.clear()
+    app_module.custom_datetime_state.clear()
+
+
+@pytest.fixture
+def bot():
+    """Real TelegramBot (keyboards, throttling) with the telebot client mocked out."""
+    telegram_bot = TelegramBot(token="123:ABC", allowed_user_id=42)
+    telegram_bot.bot = mock.MagicMock()
+    return telegram_bot
+
+
+@pytest.fixture
+def repo():
+    return mock.create_autospec(ReminderSheetRepository, instance=True)
+
+
+@pytest.fixture
+def flask_app(bot, repo):
+    flask_app = app_module.create_app()
+    flask_app.config["TELEGRAM_BOT"] = bot
+    flask_app.config["REMINDER_REPO"] = repo
+    return flask_app
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
+
+
+# --------- /dispatch-due-reminders --------- #
+
+
+def test_dispatch_marks_only_sent_reminders_notified_in_one_batch(client, bot, repo):
+    due = [make_reminder("r1"), make_reminder("r2", chat_id=7), make_reminder("r3")]
+    repo.get_due_reminders_fast.return_value = due
+    repo.batch_update_reminder_statuses.return_value = []
+
+    def send_message(chat_id, text, reply_markup=None):
+        if chat_id == 7:
+            raise RuntimeError("chat not found")
+        return mock.Mock(message_id=1)
+
+    bot.bot.send_message.side_effect = send_message
+
+    resp = client.post("/dispatch-due-reminders")
+
+    assert resp.status_code == 200
+    assert resp.get_json()["dispatched"] == 2
+    repo.batch_update_reminder_statuses.assert_called_once_with(
+        [(due[0], "notified"), (due[2], "notified")]
+    )
+
+
+# --------- /new flow --------- #
+
+
+def start_manual_reminder(client, description: str = "call mum") -> None:
+    client.post("/telegram-webhook", json=message_update("/new"))
+    client.post("/telegram-webhook", json=message_update(description))
+
+
+def test_double_tapped_offset_creates_one_reminder(flask_app, client, repo):
+    start_manual_reminder(client)
+    first_create_started = threading.Event()
+    release_first_create = threading.Event()
+
+    def create_reminder(reminder):
+        first_create_started.set()
+        assert release_first_create.wait(5)
+
+    repo.create_reminder.side_effect = create_reminder
+
+    first_tap = threading.Thread(
+        target=flask_app.test_client().post,
+        args=("/telegram-webhook",),
+        kwargs={"json": callback_update("manual_offset:1h", "cq1")},
+    )
+    first_tap.start()
+    assert first_create_started.wait(5)
+
+    # The second tap arrives while the first is still saving its reminder
+    resp = client.post("/telegram-webhook", json=callback_update("manual_offset:1h", "cq2"))
+    release_first_create.set()
+    first_tap.join(5)
+
+    assert resp.status_code == 200
+    repo.create_reminder.assert_called_once()
+    assert repo.create_reminder.call_args.args[0].description == "call mum"
+
+
+def test_failed_create_keeps_manual_flow_for_retry(client, repo):
+    start_manual_reminder(client)
+    repo.create_reminder.side_effect = [RuntimeError("sheets down"), None]
+
+    client.post("/telegram-webhook", json=callback_update("manual_offset:1d"))
+    client.post("/telegram-webhook", json=callback_update("manual_offset:1d"))
+
+    assert repo.create_reminder.call_count == 2
+    assert 42 not in app_module.manual_new_state
+
+
+# --------- /gmail-webhook --------- #
+
+
+def pubsub_envelope(history_id: int, padding: int = 0) -> bytes:
+    notification = {"emailAddress": "me@example.com", "historyId": history_id}
+    data = base64.b64encode(json.dumps(notification).encode()).decode()
+    return json.dumps({"message": {"data": data, "padding": "x" * padding}}).encode()
+
+
+def post_chunked(client, body: bytes):
+    """POST without a Content-Length, the way a chunked upload reaches the app behind gunicorn."""
+    return client.post(
+        "/gmail-webhook",
+        input_stream=io.BytesIO(body),
+        headers={"Transfer-Encoding": "chunked", "Content-Type": "application/json"},
+        environ_overrides={"wsgi.input_terminated": True},
+    )
+
+
+@pytest.fixture
+def gmail_queue(flask_app, monkeypatch):
+    """Capture queued pushes instead of letting the gmail-worker thread process them."""
+    queued: list[tuple] = []
+    monkeypatch.setattr(flask_app.config["GMAIL_TASK_QUEUE"], "put_nowait", queued.append)
+    flask_app.config["GMAIL_CLIENT"] = mock.Mock()
+    return queued
+
+
+def test_gmail_webhook_rejects_oversized_chunked_body(client, gmail_queue):
+    body = pubsub_envelope(123, padding=app_module.MAX_PUBSUB_ENVELOPE_BYTES)
+
+    resp = post_chunked(client, body)
+
+    assert resp.get_json()["reason"] == "too large"
+    assert gmail_queue == []
+
+
+def test_gmail_webhook_queues_small_chunked_body(client, gmail_queue):
+    resp = post_chunked(client, pubsub_envelope(123))
+
+    assert resp.get_json()["queued"] is True
+    assert gmail_queue == [("me@example.com", 123)]
+
+
+# --------- verify_pubsub_push_token --------- #
+
+PUSH_AUDIENCE = "https://bot.example.com/gmail-webhook"
+PUSH_SERVICE_ACCOUNT = "pubsub-push@project.iam.gserviceaccount.com"
+
+
+class GoogleKey:
+    """An RSA key standing in for one of Google's ID token signing keys."""
+
+    def __init__(self, key_id: str):
+        self.key_id = key_id
+        public_key, private_key = rsa.newkeys(1024)
+        self.cert = public_key.save_pkcs1().decode()
+        self.signer = google.auth.crypt.RSASigner.from_string(
+            private_key.save_pkcs1().decode(), key_id=key_id
+        )
+
+    def token(self, **overrides) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": PUSH_AUDIENCE,
+            "iat": now,
+            "exp": now + 300,
+            "email": PUSH_SERVICE_ACCOUNT,
+            "email_verified": True,
+        }
+        claims.update(overrides)
+        return google.auth.jwt.encode(self.signer, claims).decode()
+
+
+@pytest.fixture(scope="module")
+def old_key():
+    return GoogleKey("old")
+
+
+@pytest.fixture(scope="module")
+def new_key():
+    return GoogleKey("new")
+
+
+@pytest.fixture
+def published_certs(monkeypatch, old_key):
+    """
+    The certs Google currently publishes (mutable, to simulate a rotation), with the app's cert
+    cache emptied. Cert downloads are counted in published_certs["fetches"].
+    """
+    published = {"certs": {old_key.key_id: old_key.cert}, "fetches": 0}
+
+    def fake_request(url, method="GET"):
+        published["fetches"] += 1
+        return mock.Mock(status=200, data=json.dumps(published["certs"]).encode())
+
+    monkeypatch.setattr(app_module, "_google_auth_request", fake_request)
+    monkeypatch.setitem(app_module._google_certs, "certs", None)
+    monkeypatch.setitem(app_module._google_certs, "fetched_at", 0.0)
+    return published
+
+
+def verify(token: str, scheme: str = "Bearer") -> bool:
+    return app_module.verify_pubsub_push_token(
+        f"{scheme} {token}", audience=PUSH_AUDIENCE, service_account_email=PUSH_SERVICE_ACCOUNT
+    )
+
+
+def test_verify_push_token_accepts_valid_token(published_certs, old_key):
+    assert verify(old_key.token())
+    assert verify(old_key.token())
+    # The certs are cached between pushes
+    assert published_certs["fetches"] == 1
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"aud": "https://someone-else.example.com"},
+        {"iss": "https://evil.example.com"},
+        {"email": "attacker@example.com"},
+        {"email_verified": False},
+        {"exp": int(time.time()) - 3600, "iat": int(time.time()) - 7200},
+    ],
+)
+def test_verify_push_token_rejects_wrong_claims(published_certs, old_key, overrides):
+    assert not verify(old_key.token(**overrides))
+
+
+def test_verify_push_token_rejects_missing_or_malformed_header(published_certs, old_key):
+    assert not app_module.verify_pubsub_push_token(
+        None, audience=PUSH_AUDIENCE, service_account_email=PUSH_SERVICE_ACCOUNT
+    )
+    assert not verify(old_key.token(), scheme="Basic")
+    assert not verify("not-a-jwt")
+
+
+def test_verify_push_token_refetches_certs_after_key_rotation(published_certs, old_key, new_key):
+    assert verify(old_key.token())
+
+    # Google rotates keys; our cached certs are a few minutes old and don't know the new one yet
+    published_certs["certs"] = {new_key.key_id: new_key.cert}
+    app_module._google_certs["fetched_at"] -= 2 * app_module.GOOGLE_CERTS_MIN_REFRESH_SECONDS
+
+    assert verify(new_key.token())
+    assert published_certs["fetches"] == 2
+
+
+def test_verify_push_token_limits_refetches_for_unknown_keys(published_certs, old_key):
+    forged = GoogleKey("made-up")
+    assert verify(old_key.token())
+
+    # The certs were only just fetched, so an unknown key id doesn't trigger another download
+    assert not verify(forged.token())
+    assert not verify(forged.token())
+    assert published_certs["fetches"] == 1
+
+
+# --------- callback data dispatch --------- #
+
+
+@pytest.mark.parametrize(
+    ("data", "toast"),
+    [
+        ("manual_offset", "Invalid manual offset."),
+        ("manual_offset:1h:extra", "Invalid manual offset."),
+        ("email_action:set_reminder", "Invalid email action."),
+        ("email_offset:msg-1", "Invalid email offset."),
+        ("reminder_extend:r1:1h:extra", "Invalid reminder extend action."),
+        ("reminder_complete", "Invalid complete action."),
+    ],
+)
+def test_malformed_callback_data_is_answered(client, bot, repo, data, toast):
+    resp = client.post("/telegram-webhook", json=callback_update(data))
+
+    assert resp.status_code == 200
+    # The button stops spinning with an explanation, and nothing is read or written
+    bot.bot.answer_callback_query.assert_called_once_with("cq1", text=toast, show_alert=False)
+    assert repo.method_calls == []
+
+
+def test_unknown_callback_prefix_is_ignored(client, bot, repo):
+    resp = client.post("/telegram-webhook", json=callback_update("something_new:1"))
+
+    assert resp.status_code == 200
+    bot.bot.answer_callback_query.assert_not_called()
+    assert repo.method_calls == []
+
+
+# --------- safe_call --------- #
+
+
+def test_safe_call_passes_through_results_including_none():
+    on_error = mock.Mock()
+
+    assert app_module.safe_call("boom", on_error)(lambda x: x * 2)(21) == 42
+    assert app_module.safe_call("boom", on_error)(lambda: None)() is None
+    on_error.assert_not_called()
+
+
+def test_safe_call_logs_notifies_and_returns_sentinel_on_error(caplog):
+    on_error = mock.Mock()
+
+    def fail():
+        raise RuntimeError("sheets down")
+
+    result = app_module.safe_call("Error deleting reminder", on_error)(fail)()
+
+    assert result is app_module.CALL_FAILED
+    on_error.assert_called_once_with()
+    assert "Error deleting reminder" in caplog.text
+
+
+def test_failed_repo_call_answers_callback_and_leaves_message(client, bot, repo):
+    repo.delete_reminder.side_effect = RuntimeError("sheets down")
+
+    resp = client.post("/telegram-webhook", json=callback_update("reminder_complete:r1"))
+
+    assert resp.status_code == 200
+    bot.bot.answer_callback_query.assert_called_once_with(
+        "cq1", text="Failed to delete reminder.", show_alert=True
+    )
+    # The card keeps its buttons so the user can try again
+    bot.bot.edit_message_text.assert_not_called()
+
+
+# --------- process_gmail_notification (gmail-worker) --------- #
+
+
+@pytest.fixture
+def gmail_client(flask_app):
+    client = mock.Mock()
+    # Nothing passes the sender filter; these tests are about history bookkeeping
+    client.get_messages_metadata_batch.side_effect = lambda ids: [None] * len(ids)
+    flask_app.config["GMAIL_CLIENT"] = client
+    return client
+
+
+def push_and_wait(flask_app, client, history_id: int) -> None:
+    """Deliver a Gmail push and wait until the gmail-worker (and any follow-ups) are done."""
+    resp = client.post(
+        "/gmail-webhook", data=pubsub_envelope(history_id), content_type="application/json"
+    )
+    assert resp.get_json()["queued"] is True
+    flask_app.config["GMAIL_TASK_QUEUE"].join()
+
+
+def test_capped_push_queues_follow_up_from_last_consumed_history(flask_app, client, gmail_client):
+    flask_app.config["LAST_HISTORY_ID"] = "100"
+    full_page = [f"m{i}" for i in range(app_module.GMAIL_MAX_MESSAGES_PER_PUSH)]
+    gmail_client.list_new_message_ids_since.side_effect = [
+        (full_page, "150"),
+        (["m-last"], "160"),
+    ]
+
+    push_and_wait(flask_app, client, 170)
+
+    starts = [
+        c.kwargs["start_history_id"] for c in gmail_client.list_new_message_ids_since.call_args_list
+    ]
+    # The follow-up carries on from where the capped run stopped, without another push
+    assert starts == ["100", "150"]
+    assert all(
+        c.kwargs["max_results"] == app_module.GMAIL_MAX_MESSAGES_PER_PUSH
+        for c in gmail_client.list_new_message_ids_since.call_args_list
+    )
+    assert flask_app.config["LAST_HISTORY_ID"] == "160"
+
+
+def test_expired_history_id_resyncs_from_push(flask_app, client, gmail_client):
+    flask_app.config["LAST_HISTORY_ID"] = "100"
+    # Gmail answers 404 for a start id outside its history window
+    gmail_client.list_new_message_ids_since.return_value = ([], None)
+
+    push_and_wait(flask_app, client, 900)
+
+    assert flask_app.config["LAST_HISTORY_ID"] == 900
+    gmail_client.get_messages_metadata_batch.assert_not_called()
+
+    # The next push diffs from the re-synced id instead of failing again
+    gmail_client.list_new_message_ids_since.return_value = ([], "950")
+    push_and_wait(flask_app, client, 950)
+    assert gmail_client.list_new_message_ids_since.call_args.kwargs["start_history_id"] == "900"
@@ -0,0 +1,25 @@
+import pytest
+
+from config import parse_allowed_sender_emails
+
+
+def test_parse_allowed_sender_emails_dedupes_case_insensitively_in_order():
+    raw = "Boss@Example.com\nother@example.com\nboss@example.com\r\nOTHER@example.com\n"
+
+    assert parse_allowed_sender_emails(raw) == ["boss@example.com", "other@example.com"]
+
+
+def test_parse_allowed_sender_emails_skips_blank_and_invalid_lines():
+    raw = "\n  a@example.com  \nnot an email\nBob <bob@example.com>\n\nb@example.com\n"
+
+    assert parse_allowed_sender_emails(raw) == ["a@example.com", "b@example.com"]
+
+
+@pytest.mark.parametrize("raw", [None, ""])
+def test_parse_allowed_sender_emails_empty_input(raw):
+    assert parse_allowed_sender_emails(raw) == []
+
+
+def test_parse_allowed_sender_emails_rejects_allowlist_with_no_valid_entries():
+    with pytest.raises(ValueError):
+        parse_allowed_sender_emails("nope\nstill nope\n")
@@ -0,0 +1,237 @@
+import base64
+import json
+from unittest import mock
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from gmail_client import GmailClient
+
+FORWARDED_BODY = (
+    "FYI\n"
+    "---------- Forwarded message ---------\n"
+    "From: Boss <boss@example.com>\n"
+    "Subject: Quarterly numbers\n"
+    "To: team@example.com\n"
+)
+
+
+def b64(text: str) -> str:
+    """Base64url without padding, the way Gmail returns body data."""
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def full_message(message_id: str) -> dict:
+    """messages.get(format="full") response; the subject carries the id to tell results apart."""
+    return {
+        "id": message_id,
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": [
+                {"name": "From", "value": "Me <me@example.com>"},
+                {"name": "To", "value": "bot@example.com"},
+                {"name": "Subject", "value": f"Fwd: {message_id}"},
+            ],
+            "parts": [
+                {"mimeType": "text/html", "body": {"data": b64("<p>FYI</p>")}},
+                {"mimeType": "text/plain", "body": {"data": b64(FORWARDED_BODY)}},
+            ],
+        },
+    }
+
+
+def http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeRequest:
+    """Stands in for the HttpRequest returned by messages().get()."""
+
+    def __init__(self, message_id: str, errors: dict[str, Exception]):
+        self.message_id = message_id
+        self.errors = errors
+
+    def execute(self, http=None, num_retries=0):
+        error = self.errors.get(self.message_id)
+        if error is not None:
+            raise error
+        return full_message(self.message_id)
+
+
+class FakeBatch:
+    """Runs the added requests and reports them to the callback, like BatchHttpRequest."""
+
+    def __init__(self, callback, part_errors: dict[str, Exception], fail_whole_batch: bool):
+        self.callback = callback
+        self.part_errors = part_errors
+        self.fail_whole_batch = fail_whole_batch
+        self.requests: list[tuple[str, FakeRequest]] = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        if self.fail_whole_batch:
+            raise ConnectionError("batch endpoint unavailable")
+        for request_id, request in self.requests:
+            error = self.part_errors.get(request.message_id)
+            if error is not None:
+                self.callback(request_id, None, error)
+            else:
+                self.callback(request_id, full_message(request.message_id), None)
+
+
+@pytest.fixture
+def client():
+    token = json.dumps(
+        {
+            "token": "access",
+            "refresh_token": "refresh",
+            "client_id": "client-id",
+            "client_secret": "client-secret",
+        }
+    )
+    return GmailClient(token)
+
+
+def stub_gmail(
+    client: GmailClient,
+    part_errors: dict[str, Exception] | None = None,
+    fetch_errors: dict[str, Exception] | None = None,
+    fail_whole_batch: bool = False,
+) -> mock.Mock:
+    """
+    Replace the Gmail resources with fakes. Returns the messages().get mock, whose calls are
+    the individual (non-batch) fetches plus the requests added to batches.
+    """
+    part_errors = part_errors or {}
+    fetch_errors = fetch_errors or {}
+    client.service = mock.Mock()
+    client.service.new_batch_http_request.side_effect = lambda callback: FakeBatch(
+        callback, part_errors, fail_whole_batch
+    )
+    client._messages = mock.Mock()
+    client._messages.get.side_effect = lambda userId, id, **kwargs: FakeRequest(id, fetch_errors)
+    return client._messages.get
+
+
+# --------- _get_plain_text --------- #
+
+
+def test_get_plain_text_finds_nested_plain_part(client):
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    {"mimeType": "text/html", "body": {"data": b64("<b>html</b>")}},
+                    {"mimeType": "text/plain", "body": {"data": b64("plain body")}},
+                ],
+            },
+            {"mimeType": "application/pdf", "filename": "a.pdf", "body": {"attachmentId": "x"}},
+        ],
+    }
+
+    assert client._get_plain_text(payload) == "plain body"
+
+
+def test_get_plain_text_returns_first_plain_part_in_document_order(client):
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [{"mimeType": "text/plain", "body": {"data": b64("first")}}],
+            },
+            {"mimeType": "text/plain", "body": {"data": b64("second")}},
+        ],
+    }
+
+    assert client._get_plain_text(payload) == "first"
+
+
+def test_get_plain_text_skips_non_text_parts(client):
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {"mimeType": "text/html", "body": {"data": b64("<p>only html</p>")}},
+            # Never descended into, even though something text/plain sits inside
+            {
+                "mimeType": "application/octet-stream",
+                "parts": [{"mimeType": "text/plain", "body": {"data": b64("hidden")}}],
+            },
+            {"mimeType": "image/png", "body": {"attachmentId": "img"}},
+        ],
+    }
+
+    assert client._get_plain_text(payload) is None
+
+
+# --------- forwarded recipient --------- #
+
+
+@pytest.mark.parametrize(
+    "subject",
+    ["Fwd: Numbers", "FW: Numbers", "Re: Fwd: Numbers", "AW: WG: Zahlen", "", None],
+)
+def test_extract_original_recipient_scans_forwards_and_unknown_subjects(client, subject):
+    message = full_message("m1")
+
+    recipient = client._extract_original_recipient_from_body(message, subject=subject)
+    assert recipient == "team@example.com"
+
+
+def test_extract_original_recipient_skips_body_for_plain_subject(client):
+    message = full_message("m1")
+
+    assert client._extract_original_recipient_from_body(message, subject="Re: Numbers") is None
+
+
+# --------- get_messages_metadata_batch --------- #
+
+
+def test_batch_metadata_parses_and_keeps_input_order(client):
+    stub_gmail(client)
+
+    results = client.get_messages_metadata_batch(["a", "b", "a"])
+
+    assert [r["subject"] for r in results] == ["Fwd: a", "Fwd: b", "Fwd: a"]
+    assert results[0]["original_recipient"] == "team@example.com"
+    client.service.new_batch_http_request.assert_called_once()
+
+
+def test_batch_metadata_falls_back_to_individual_fetch_when_batch_fails(client):
+    get = stub_gmail(client, fail_whole_batch=True)
+
+    results = client.get_messages_metadata_batch(["a", "b"])
+
+    assert [r["subject"] for r in results] == ["Fwd: a", "Fwd: b"]
+    # Two requests added to the failed batch, then one individual fetch per message
+    assert get.call_count == 4
+
+
+def test_batch_metadata_refetches_only_retryable_parts(client):
+    get = stub_gmail(client, part_errors={"limited": http_error(429), "gone": http_error(404)})
+
+    results = client.get_messages_metadata_batch(["ok", "limited", "gone"])
+
+    assert results[0]["subject"] == "Fwd: ok"
+    assert results[1]["subject"] == "Fwd: limited"
+    assert results[2] is None
+    fetched_individually = [c.kwargs["id"] for c in get.call_args_list[3:]]
+    assert fetched_individually == ["limited"]
+
+
+def test_batch_metadata_individual_fetch_failure_yields_none(client):
+    stub_gmail(
+        client,
+        fail_whole_batch=True,
+        fetch_errors={"b": http_error(500)},
+    )
+
+    results = client.get_messages_metadata_batch(["a", "b"])
+
+    assert results[0]["subject"] == "Fwd: a"
+    assert results[1] is None
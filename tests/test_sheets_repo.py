@@ -0,0 +1,308 @@
+import threading
+from datetime import datetime, UTC
+from unittest import mock
+
+import gspread
+import pytest
+import requests
+from gspread.utils import rowcol_to_a1
+
+import sheets_repo
+from sheets_repo import (
+    COL_DUE_AT,
+    COL_STATUS,
+    REMINDER_HEADERS,
+    SHEETS_MAX_ATTEMPTS,
+    Reminder,
+    ReminderSheetRepository,
+    _with_retry,
+)
+
+
+def api_error(status: int, retry_after: str | None = None) -> gspread.exceptions.APIError:
+    response = requests.Response()
+    response.status_code = status
+    response._content = b'{"error": {"code": %d, "message": "boom", "status": "X"}}' % status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return gspread.exceptions.APIError(response)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the backoff delays instead of actually sleeping."""
+    delays: list[float] = []
+    monkeypatch.setattr(sheets_repo.time, "sleep", delays.append)
+    return delays
+
+
+def make_reminder(reminder_id: str, row_number: int | None) -> Reminder:
+    return Reminder(
+        reminder_id=reminder_id,
+        source_type="manual",
+        gmail_message_id=None,
+        subject=None,
+        sender=None,
+        recipient=None,
+        description=f"desc {reminder_id}",
+        telegram_chat_id=42,
+        due_at=datetime(2030, 1, 1, tzinfo=UTC),
+        status="pending",
+        row_number=row_number,
+    )
+
+
+def make_repo(rows: list[list[str]]) -> ReminderSheetRepository:
+    """
+    Repository over an in-memory sheet (rows[0] is the header), without touching Google.
+    """
+    repo = object.__new__(ReminderSheetRepository)
+    repo.worksheet_name = "Reminders"
+    repo.worksheet = mock.Mock(id=0)
+    repo.spreadsheet = mock.Mock()
+
+    def get_all_records():
+        return [dict(zip(REMINDER_HEADERS, row)) for row in rows[1:]]
+
+    def values_get(range_name):
+        # Only single reminder_id cells are read in these tests, e.g. 'Reminders'!A3
+        row_number = int(range_name.rsplit("!A", 1)[1])
+        if row_number > len(rows):
+            return {"range": range_name}
+        return {"range": range_name, "values": [[rows[row_number - 1][0]]]}
+
+    def values_batch_get(ranges):
+        return {"valueRanges": [values_get(range_name) for range_name in ranges]}
+
+    def batch_update(body):
+        for request in body["requests"]:
+            rng = request["deleteDimension"]["range"]
+            del rows[rng["startIndex"]:rng["endIndex"]]
+
+    repo.worksheet.get_all_records.side_effect = get_all_records
+    repo.spreadsheet.values_get.side_effect = values_get
+    repo.spreadsheet.values_batch_get.side_effect = values_batch_get
+    repo.spreadsheet.batch_update.side_effect = batch_update
+
+    repo._cache = None
+    repo._id_index = {}
+    repo._cache_loaded_at = 0.0
+    repo._cache_generation = 0
+    repo._cache_lock = threading.Lock()
+    return repo
+
+
+def sheet_row(reminder_id: str) -> list[str]:
+    values = {
+        "reminder_id": reminder_id,
+        "source_type": "manual",
+        "description": f"desc {reminder_id}",
+        "telegram_chat_id": "42",
+        "due_at": "2030-01-01T00:00:00+00:00",
+        "status": "pending",
+    }
+    return [values.get(header, "") for header in REMINDER_HEADERS]
+
+
+# --------- _with_retry --------- #
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_with_retry_retries_rate_limits_and_server_errors(sleeps, status):
+    fn = mock.Mock(side_effect=[api_error(status), api_error(status), "ok"])
+
+    assert _with_retry(fn, "a", key="b") == "ok"
+    assert fn.call_count == 3
+    fn.assert_called_with("a", key="b")
+    assert len(sleeps) == 2
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_with_retry_does_not_retry_client_errors(sleeps, status):
+    fn = mock.Mock(side_effect=api_error(status))
+
+    with pytest.raises(gspread.exceptions.APIError):
+        _with_retry(fn)
+    assert fn.call_count == 1
+    assert sleeps == []
+
+
+def test_with_retry_non_idempotent_only_retries_429(sleeps):
+    fn = mock.Mock(side_effect=[api_error(429), "ok"])
+    assert _with_retry(fn, idempotent=False) == "ok"
+
+    # A 5xx may already have been applied, so it must not be repeated
+    fn = mock.Mock(side_effect=api_error(503))
+    with pytest.raises(gspread.exceptions.APIError):
+        _with_retry(fn, idempotent=False)
+    assert fn.call_count == 1
+
+
+def test_with_retry_reraises_last_error_after_max_attempts(sleeps):
+    errors = [api_error(500) for _ in range(SHEETS_MAX_ATTEMPTS)]
+    fn = mock.Mock(side_effect=errors)
+
+    with pytest.raises(gspread.exceptions.APIError) as excinfo:
+        _with_retry(fn)
+    assert excinfo.value is errors[-1]
+    assert fn.call_count == SHEETS_MAX_ATTEMPTS
+    assert len(sleeps) == SHEETS_MAX_ATTEMPTS - 1
+
+
+def test_with_retry_honours_retry_after(sleeps):
+    fn = mock.Mock(side_effect=[api_error(429, retry_after="7"), "ok"])
+
+    assert _with_retry(fn) == "ok"
+    assert sleeps == [7.0]
+
+
+# --------- cache / row lookups --------- #
+
+
+def test_write_on_cold_cache_skips_row_check():
+    repo = make_repo([REMINDER_HEADERS, sheet_row("r1"), sheet_row("r2")])
+
+    assert repo.update_reminder_status("r2", "done")
+
+    # The sheet was just read, so its row numbers are trusted without another round-trip
+    repo.worksheet.get_all_records.assert_called_once()
+    repo.spreadsheet.values_get.assert_not_called()
+    repo.worksheet.update_cell.assert_called_once_with(3, COL_STATUS, "done")
+
+
+def test_write_on_warm_cache_rechecks_row_moved_by_hand():
+    rows = [REMINDER_HEADERS, sheet_row("r1"), sheet_row("r2")]
+    repo = make_repo(rows)
+    repo.get_all_reminders()
+
+    rows.insert(1, sheet_row("manual"))
+
+    assert repo.update_reminder_status("r2", "done")
+    repo.spreadsheet.values_get.assert_called_once()
+    assert repo.worksheet.get_all_records.call_count == 2
+    repo.worksheet.update_cell.assert_called_once_with(4, COL_STATUS, "done")
+
+
+def test_write_for_unknown_id_reads_sheet_once():
+    repo = make_repo([REMINDER_HEADERS, sheet_row("r1")])
+
+    assert not repo.update_reminder_status("nope", "done")
+    repo.worksheet.get_all_records.assert_called_once()
+    repo.worksheet.update_cell.assert_not_called()
+
+
+def test_patch_cache_after_delete_shifts_later_rows():
+    repo = make_repo([REMINDER_HEADERS])
+    cached = [make_reminder("r1", 2), make_reminder("r2", 3), make_reminder("r3", 4)]
+    repo._cache = list(cached)
+    repo._id_index = {r.reminder_id: r for r in cached}
+
+    repo._patch_cache_after_delete("r2", 3)
+
+    assert [(r.reminder_id, r.row_number) for r in repo._cache] == [("r1", 2), ("r3", 3)]
+    assert set(repo._id_index) == {"r1", "r3"}
+    assert repo._id_index["r3"].row_number == 3
+    # Objects already handed out to callers keep their old row numbers
+    assert cached[2].row_number == 4
+    assert repo._cache_generation == 1
+
+
+def test_patch_cache_after_delete_drops_cache_for_unknown_id():
+    repo = make_repo([REMINDER_HEADERS])
+    repo._cache = [make_reminder("r1", 2)]
+    repo._id_index = {"r1": repo._cache[0]}
+
+    repo._patch_cache_after_delete("missing", 2)
+
+    assert repo._cache is None
+    assert repo._id_index == {}
+    assert repo._cache_generation == 1
+
+
+def test_delete_reminder_rechecks_row_moved_by_hand():
+    rows = [REMINDER_HEADERS, sheet_row("r1"), sheet_row("r2"), sheet_row("r3")]
+    repo = make_repo(rows)
+    repo.get_all_reminders()
+
+    # Someone inserts a row by hand inside the cache TTL, so r2 is now on row 4, not 3
+    rows.insert(1, sheet_row("manual"))
+
+    assert repo.delete_reminder("r2")
+    assert [row[0] for row in rows[1:]] == ["manual", "r1", "r3"]
+
+
+def test_batch_update_reminder_statuses_uses_given_row_numbers():
+    repo = make_repo([REMINDER_HEADERS, sheet_row("r1"), sheet_row("r2")])
+
+    assert repo.batch_update_reminder_statuses([(make_reminder("r2", 3), "notified")]) == []
+
+    repo.spreadsheet.values_batch_update.assert_called_once_with(
+        {
+            "valueInputOption": "RAW",
+            "data": [
+                {"range": "'Reminders'!" + rowcol_to_a1(3, COL_STATUS), "values": [["notified"]]}
+            ],
+        }
+    )
+    # Rows still holding their reminder are written directly, without re-reading the sheet
+    repo.spreadsheet.values_batch_get.assert_called_once_with(["'Reminders'!A3"])
+    repo.worksheet.get_all_records.assert_not_called()
+
+
+def test_batch_update_reminder_statuses_follows_rows_that_moved():
+    rows = [REMINDER_HEADERS, sheet_row("r1"), sheet_row("r2"), sheet_row("r3")]
+    repo = make_repo(rows)
+    due = [make_reminder("r2", 3), make_reminder("r3", 4)]
+
+    # While the reminders were being sent, r1 was completed and its row deleted
+    del rows[1]
+
+    assert repo.batch_update_reminder_statuses([(r, "notified") for r in due]) == []
+
+    body = repo.spreadsheet.values_batch_update.call_args.args[0]
+    written = sorted(d["range"] for d in body["data"])
+    # r2 is now on row 2 and r3 on row 3; the stale rows 3 and 4 are left alone
+    assert written == sorted(
+        "'Reminders'!" + rowcol_to_a1(row, COL_STATUS) for row in (2, 3)
+    )
+
+
+def test_batch_update_reminder_statuses_reports_unknown_ids():
+    repo = make_repo([REMINDER_HEADERS, sheet_row("r1")])
+
+    missing = repo.batch_update_reminder_statuses([(make_reminder("nope", None), "notified")])
+
+    assert missing == ["nope"]
+    repo.spreadsheet.values_batch_update.assert_not_called()
+
+
+def test_update_reminder_due_at_retries_with_the_same_ranges(sleeps):
+    repo = make_repo([REMINDER_HEADERS, sheet_row("r1"), sheet_row("r2")])
+    repo.spreadsheet.values_batch_update.side_effect = [api_error(503), {}]
+    new_due_at = datetime(2031, 5, 1, 9, 30, tzinfo=UTC)
+
+    assert repo.update_reminder_due_at("r2", new_due_at)
+
+    # The retry must resend the original ranges, not ones already prefixed by the first attempt
+    assert repo.spreadsheet.values_batch_update.call_count == 2
+    assert repo.spreadsheet.values_batch_update.call_args.args[0] == {
+        "valueInputOption": "USER_ENTERED",
+        "data": [
+            {
+                "range": "'Reminders'!" + rowcol_to_a1(3, COL_DUE_AT),
+                "values": [[new_due_at.isoformat()]],
+            },
+            {"range": "'Reminders'!" + rowcol_to_a1(3, COL_STATUS), "values": [["pending"]]},
+        ],
+    }
+
+
+def test_batch_update_reminder_statuses_retries_with_the_same_ranges(sleeps):
+    repo = make_repo([REMINDER_HEADERS, sheet_row("r1")])
+    repo.spreadsheet.values_batch_update.side_effect = [api_error(503), {}]
+
+    assert repo.batch_update_reminder_statuses([(make_reminder("r1", 2), "notified")]) == []
+
+    assert repo.spreadsheet.values_batch_update.call_count == 2
+    body = repo.spreadsheet.values_batch_update.call_args.args[0]
+    assert body["data"][0]["range"] == "'Reminders'!" + rowcol_to_a1(2, COL_STATUS)